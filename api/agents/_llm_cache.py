@@ -0,0 +1,74 @@
+"""
+LLM Response Cache
+
+Small thread-safe LRU cache used by the agents to skip LLM round-trips
+for inputs they have already seen.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from langchain_core.messages import BaseMessage
+
+
+class LRUCache:
+    """A bounded mapping that evicts the least recently used entry first."""
+
+    def __init__(self, maxsize: int = 2048):
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+def cached_invoke(cache: LRUCache, prompt, model, inputs: Dict[str, Any],
+                  on_miss: Optional[Callable[[List[BaseMessage], str], None]] = None) -> str:
+    """
+    Invoke model on the rendered prompt, reusing the answer to an identical prompt.
+
+    The key is a sha256 of the fully rendered messages, so only byte-for-byte
+    identical prompts hit, and a response can only be reused for a prompt
+    that already contained the same caller data. Use it where any earlier
+    answer to the prompt is as good as a new one: temperature=0 classifiers,
+    or rephrasings where one sample is as valid as another.
+
+    Args:
+        cache: The LRUCache to store responses in
+        prompt: ChatPromptTemplate to render
+        model: Chat model to invoke on a miss
+        inputs: Template variables
+        on_miss: Called with the messages and the new response after a model call
+
+    Returns:
+        The response content
+    """
+    messages = prompt.format_messages(**inputs)
+    rendered = "\n".join(f"{message.type}: {message.content}" for message in messages)
+    key = hashlib.sha256(rendered.encode()).hexdigest()
+
+    content = cache.get(key)
+    if content is None:
+        content = model.invoke(messages).content
+        cache.set(key, content)
+        if on_miss is not None:
+            on_miss(messages, content)
+    return content
@@ -0,0 +1,40 @@
+"""
+Chat Model Factory
+
+Builds one ChatGroq client per (model, temperature) pair. All of them send
+their requests through one keep-alive HTTP connection pool. Agents only
+name their models at import; each client is built the first time a node
+asks for it.
+"""
+
+import os
+from functools import lru_cache
+import httpx
+from dotenv import load_dotenv
+from langchain_groq import ChatGroq
+
+# Load environment variables
+load_dotenv()
+
+# Shared by every agent so warm TLS connections to Groq are reused across models;
+# nodes run synchronously on the turn and speculation thread pools
+http_client = httpx.Client(
+    timeout=30.0,
+    limits=httpx.Limits(max_connections=64, max_keepalive_connections=32, keepalive_expiry=60.0)
+)
+
+
+@lru_cache(maxsize=None)
+def get_chat_model(model_name: str, temperature: float) -> ChatGroq:
+    """
+    Returns the shared ChatGroq client for a model and temperature.
+
+    Args:
+        model_name: Groq model ID, e.g. "llama-3.3-70b-versatile"
+        temperature: Sampling temperature
+
+    Returns:
+        The ChatGroq client, created on first request
+    """
+    return ChatGroq(api_key=os.getenv("GROQ_API_KEY"), model=model_name, temperature=temperature,
+                    http_client=http_client)
@@ -6,22 +6,23 @@ It will provide helpful responses to questions about the form, process, or curre
 """
 
 from typing import Dict, Any, List
-import os
+import logging
+from functools import lru_cache
 from dotenv import load_dotenv
-from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
 from ..core.state import ConversationState
 # from utils.tts import text_to_speech
 
-from ..questions.questions import QUESTIONS
 from ..utils.question_utils import get_question_by_id
+from ._models import get_chat_model
 
 # Load environment variables
 load_dotenv()
-groq_api_key = os.getenv("GROQ_API_KEY")
+logger = logging.getLogger(__name__)
 
-model = ChatGroq(api_key=groq_api_key,
-                 model="llama-3.3-70b-versatile", temperature=0.2)
+# Clients are resolved through get_chat_model() when a node first runs, not at import
+MODEL_NAME = "llama-3.3-70b-versatile"
+TEMPERATURE = 0.2
 
 DEVIATION_ANSWER_PROMPT = """
 You are an intelligent phone intake assistant for a real estate closing service.
@@ -48,6 +49,12 @@ deviation_answer_prompt = ChatPromptTemplate.from_template(
     DEVIATION_ANSWER_PROMPT)
 
 
+@lru_cache(maxsize=None)
+def deviation_answer_chain():
+    """Returns the deviation answer chain, composed on first use."""
+    return deviation_answer_prompt | get_chat_model(MODEL_NAME, TEMPERATURE)
+
+
 def handle_question_node(state: ConversationState) -> Dict[str, Any]:
     """
     LangGraph node to handle user clarifying questions.
@@ -57,21 +64,20 @@ def handle_question_node(state: ConversationState) -> Dict[str, Any]:
 
     # Check if we're at the farewell - if so, immediately terminate
     if current_question_id == "farewell":
-        print("\nConversation complete. Thank you for using our service!")
+        logger.info("Conversation complete")
         return {"is_done": True}
 
     current_question = get_question_by_id(current_question_id)
 
     user_response = state.get("user_response", "")
 
-    chain = deviation_answer_prompt | model
-    answer_response = chain.invoke({
+    answer_response = deviation_answer_chain().invoke({
         "question_text": current_question["text"],
         "user_response": user_response
     })
 
     agent_response = answer_response.content
-    history = state["conversation_history"] + [("Assistant", agent_response)]
+    history = [("Assistant", agent_response)]
 
     # Comment out TTS
     # text_to_speech(agent_response, voice="Calum-PlayAI")
@@ -6,22 +6,27 @@ It will parse and normalize answers to fill in the form correctly.
 """
 
 from typing import Dict, Any, Optional, List, Union
-import os
 from dotenv import load_dotenv
-from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
 from ..questions.questions import QUESTIONS
 from ..core.state import ConversationState
 from ..utils.date_utils import normalize_date
 from ..utils.json_utils import update_test_json
-from ..utils.extraction_utils import get_extraction_prompt, process_structured_field, is_date_question, FIELD_MAPPING
+from ..utils.extraction_utils import get_extraction_prompt, process_structured_field, is_date_question, parse_yes_no, is_filler_response, is_confirmation, get_field_info
 from ..utils.question_utils import get_question_by_id
+from ._models import get_chat_model
 
 # Load environment variables
 load_dotenv()
-groq_api_key = os.getenv("GROQ_API_KEY")
 
-model = ChatGroq(api_key=groq_api_key, model="llama-3.3-70b-versatile", temperature=0.1)
+# Clients are resolved through get_chat_model() when a node first runs, not at import
+MODEL_NAME = "llama-3.3-70b-versatile"
+TEMPERATURE = 0.1
+
+# Names, yes/no answers and plain values are simple enough for the much faster 8B model;
+# structured fields and verification keep the 70B model
+FAST_MODEL_NAME = "llama-3.1-8b-instant"
+FAST_TEMPLATES = {"default", "name", "boolean"}
 
 # Prompt templates for different question types
 PROMPTS = {
@@ -29,7 +34,6 @@ PROMPTS = {
 You are an entity extraction agent for a form-filling system. Extract only the requested information from the user's response.
 
 Current question: {question_text}
-Question ID: {question_id}
 User's response: {user_response}
 
 Return ONLY the extracted answer. No explanation or additional text.
@@ -109,11 +113,21 @@ If the user provides a correction, return ONLY the corrected value without any e
 """
 }
 
+# Templates are compiled once instead of on every extraction. Each call formats
+# the messages and invokes the model directly, without a RunnableSequence.
+PROMPT_TEMPLATES = {key: ChatPromptTemplate.from_template(template) for key, template in PROMPTS.items()}
+EXTRACTION_MODELS = {key: FAST_MODEL_NAME if key in FAST_TEMPLATES else MODEL_NAME for key in PROMPTS}
+
 def extract_entities_node(state: ConversationState) -> Dict[str, Any]:
     """
     LangGraph node to extract entities from the user's answer.
     Updates the form_data field in the state.
     """
+    # classify_intent_node already ran the extraction while classifying this answer
+    speculative_extraction = state.get("speculative_extraction")
+    if speculative_extraction is not None:
+        return {**speculative_extraction, "speculative_extraction": None}
+    
     current_question_id = state["current_question_id"]
     current_question = get_question_by_id(current_question_id)
     
@@ -125,6 +139,10 @@ def extract_entities_node(state: ConversationState) -> Dict[str, Any]:
     if state.get("is_verification", False):
         return process_verification_response(state, current_question_id, current_question, user_response)
     
+    # Nothing to extract from silence or "uh"/"hmm"; skip the LLM call
+    if is_filler_response(user_response):
+        return {}
+    
     if is_date_question(current_question["text"]):
         normalized_date = normalize_date(user_response)
         if normalized_date != "incomplete":
@@ -136,25 +154,31 @@ def extract_entities_node(state: ConversationState) -> Dict[str, Any]:
             
             return {"form_data": updated_form_data}
     
+    # Clear yes/no answers to boolean questions skip the LLM round-trip
+    field_info = get_field_info(current_question_id)
+    if field_info.type == "boolean":
+        answer = parse_yes_no(user_response)
+        if answer:
+            updated_form_data = state["form_data"].copy()
+            updated_form_data[current_question_id] = answer
+            return {"form_data": updated_form_data}
+    
     prompt_info = get_extraction_prompt(
         current_question_id, 
         current_question["text"], 
         user_response
     )
     
-    prompt_template = PROMPTS[prompt_info["template_key"]]
-    extraction_prompt = ChatPromptTemplate.from_template(prompt_template)
-    
-    chain = extraction_prompt | model
-    extraction_response = chain.invoke(prompt_info["data"])
+    template_key = prompt_info["template_key"]
+    messages = PROMPT_TEMPLATES[template_key].format_messages(**prompt_info["data"])
+    extraction_response = get_chat_model(EXTRACTION_MODELS[template_key], TEMPERATURE).invoke(messages)
     
     extracted_value = extraction_response.content.strip()
     
     if extracted_value.lower() == "incomplete":
         return {}
         
-    field_info = FIELD_MAPPING.get(current_question_id, {"type": "text"})
-    if field_info["type"] == "structured":
+    if field_info.type == "structured":
         extracted_value = process_structured_field(extracted_value, current_question_id)
         
     updated_form_data = state["form_data"].copy()
@@ -172,19 +196,23 @@ def process_verification_response(state: ConversationState,
     """
     Process a verification response from the user.\
     """
+    # A bare "yes"/"that's right" keeps the pre-filled value without an LLM call
+    if is_confirmation(user_response):
+        return {
+            "is_verification": False
+        }
+    
     form_data = state["form_data"]
     prefilled_value = form_data.get(question_id, "")
-    field_info = FIELD_MAPPING.get(question_id, {"type": "text"})
-    
-    verification_prompt = ChatPromptTemplate.from_template(PROMPTS["verification"])
+    field_info = get_field_info(question_id)
     
-    chain = verification_prompt | model
-    verification_response = chain.invoke({
-        "question_text": question["text"],
-        "prefilled_value": prefilled_value,
-        "user_response": user_response,
-        "field_type": field_info["type"]
-    })
+    messages = PROMPT_TEMPLATES["verification"].format_messages(
+        question_text=question["text"],
+        prefilled_value=prefilled_value,
+        user_response=user_response,
+        field_type=field_info.type
+    )
+    verification_response = get_chat_model(EXTRACTION_MODELS["verification"], TEMPERATURE).invoke(messages)
     
     extracted_value = verification_response.content.strip()
     
@@ -195,10 +223,10 @@ def process_verification_response(state: ConversationState,
     
     updated_form_data = form_data.copy()
     
-    if field_info["type"] == "date":
+    if field_info.type == "date":
         extracted_value = normalize_date(extracted_value)
     
-    if field_info["type"] == "structured":
+    if field_info.type == "structured":
         extracted_value = process_structured_field(extracted_value, question_id)
     
     updated_form_data[question_id] = extracted_value
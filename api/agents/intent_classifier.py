@@ -8,21 +8,57 @@ This agent classifies user responses into one of four categories:
 4. Correction - User wants to correct a previous answer or go back
 """
 
-from typing import Dict, Any, Literal
+from typing import Dict, Any, List, Literal
 import os
+import itertools
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from langchain_groq import ChatGroq
+from langchain_core.messages import BaseMessage
 from langchain_core.prompts import ChatPromptTemplate
 from ..core.state import ConversationState
 
 from ..questions.questions import QUESTIONS
 from ..utils.question_utils import get_question_by_id
+from ..utils.extraction_utils import is_filler_response, is_confirmation, is_go_back_request
+from ._llm_cache import LRUCache, cached_invoke
+from ._models import get_chat_model
+from .entity_extraction import extract_entities_node
 
 # Load environment variables
 load_dotenv()
-groq_api_key = os.getenv("GROQ_API_KEY")
+logger = logging.getLogger(__name__)
 
-model = ChatGroq(api_key=groq_api_key, model="llama-3.3-70b-versatile", temperature=0.1)
+# temperature=0 so identical prompts can be answered from intent_cache.
+# Four-way classification does not need the 70B model, and it runs on every turn
+MODEL_NAME = "llama-3.1-8b-instant"
+TEMPERATURE = 0.0
+
+# Opt-in quality check: set INTENT_SHADOW_EVAL_TURNS=N and the 70B model re-classifies
+# the first N uncached classifications of each process in the background, logging disagreements
+SHADOW_MODEL_NAME = "llama-3.3-70b-versatile"
+SHADOW_EVAL_TURNS = int(os.getenv("INTENT_SHADOW_EVAL_TURNS", "0"))
+shadow_turns = itertools.count()
+shadow_executor = ThreadPoolExecutor(max_workers=2)
+
+intent_cache = LRUCache(maxsize=4096)
+
+# Messages of recent history shown to the classifier (two user/assistant exchanges)
+CONTEXT_MESSAGES = 4
+
+VALID_INTENTS = frozenset({"confusion", "question", "answer", "correction"})
+
+# Verification intents mapped to standard intents for the workflow; a correction of
+# pre-filled data is still an answer, entity extraction will handle it
+VERIFICATION_INTENTS = {
+    "confirmation": "answer",
+    "correction": "answer",
+    "question": "question"
+}
+
+# Extraction only depends on the question and the user's response, so it is started
+# speculatively while the intent is classified and kept when the intent is "answer"
+speculative_executor = ThreadPoolExecutor(max_workers=8)
 
 INTENT_CLASSIFIER_PROMPT = """
 You are an intent classifier for a conversational AI assistant that helps users fill out forms.
@@ -33,10 +69,6 @@ Your task is to analyze the user's response and classify it into one of four cat
 3. "answer" - The user has provided a clear, direct answer to the question
 4. "correction" - The user wants to go back, undo, or correct a previous answer
 
-Current question being asked: {question_text}
-Recent conversation context: {conversation_context}
-User response: {user_response}
-
 IMPORTANT CLASSIFICATION GUIDELINES:
 
 For "confusion" classification:
@@ -73,6 +105,12 @@ Always remember:
 Return ONLY the category name (confusion, question, answer, or correction) with no additional explanation.
 """
 
+INTENT_CLASSIFIER_PROMPT_INPUT = """
+Current question being asked: {question_text}
+Recent conversation context: {conversation_context}
+User response: {user_response}
+"""
+
 VERIFICATION_INTENT_PROMPT = """
 You are an intent classifier for a conversational AI assistant that helps users fill out forms.
 Your task is to analyze the user's response to a verification question and classify it into one of four categories.
@@ -84,10 +122,6 @@ We are verifying pre-filled data with the user. The assistant has just asked the
 3. "question" - The user asks a clarifying question about the verification
 4. "confusion" - The user's response is unclear, irrelevant, or doesn't address the verification
 
-Current verification question: {question_text}
-Recent conversation context: {conversation_context}
-User response: {user_response}
-
 IMPORTANT CLASSIFICATION GUIDELINES:
 - For simple confirmations like "yes", "correct", "that's right", classify as "confirmation"
 - When the user provides new information to correct the pre-filled data, classify as "correction"
@@ -97,13 +131,24 @@ IMPORTANT CLASSIFICATION GUIDELINES:
 Return ONLY the category name (confirmation, correction, question, or confusion) with no additional explanation.
 """
 
-intent_classifier_prompt = ChatPromptTemplate.from_template(INTENT_CLASSIFIER_PROMPT)
-verification_intent_prompt = ChatPromptTemplate.from_template(VERIFICATION_INTENT_PROMPT)
+VERIFICATION_INTENT_PROMPT_INPUT = """
+Current verification question: {question_text}
+User response: {user_response}
+"""
+
+intent_classifier_prompt = ChatPromptTemplate.from_messages([
+    ("system", INTENT_CLASSIFIER_PROMPT),
+    ("human", INTENT_CLASSIFIER_PROMPT_INPUT)
+])
+verification_intent_prompt = ChatPromptTemplate.from_messages([
+    ("system", VERIFICATION_INTENT_PROMPT),
+    ("human", VERIFICATION_INTENT_PROMPT_INPUT)
+])
 
 def classify_intent_node(state: ConversationState) -> Dict[str, Any]:
     """
     LangGraph node to classify the user's response intent.
-    Updates the intent field in the state.
+    Updates the intent field in the state, plus speculative_extraction on answers.
     """
     current_question_id = state["current_question_id"]
     
@@ -114,44 +159,113 @@ def classify_intent_node(state: ConversationState) -> Dict[str, Any]:
     
     user_response = state.get("user_response", "")
     
-    conversation_history = state.get("conversation_history", [])
-    recent_exchanges = conversation_history[-6:] if len(conversation_history) > 6 else conversation_history
-    conversation_context = "\n".join([f"{'User' if role == 'User' else 'Assistant'}: {message}" for role, message in recent_exchanges])
+    if not should_speculate(state, user_response):
+        intent = classify_intent(state, current_question, user_response)
+        return {"intent": intent, "speculative_extraction": None}
+    
+    speculative_extraction = speculative_executor.submit(extract_entities_node, state)
+    intent = classify_intent(state, current_question, user_response)
+    
+    if intent != "answer":
+        # cancel() only helps if the job has not started; a running extraction
+        # finishes in the background and its result is dropped
+        speculative_extraction.cancel()
+        return {"intent": intent, "speculative_extraction": None}
+    
+    try:
+        extraction = speculative_extraction.result()
+    except Exception:
+        # extract_entities_node runs again on its own and surfaces the error there
+        extraction = None
+    
+    return {"intent": intent, "speculative_extraction": extraction}
+
+def should_speculate(state: ConversationState, user_response: str) -> bool:
+    """
+    Whether to start extraction before the intent is known.
+    
+    Filler is classified as confusion without an LLM call, so there is nothing
+    to overlap. On verification turns extraction is a 70B call, so it is only
+    started when a bare confirmation already decides the turn (and the
+    extraction is free).
+    """
+    if is_filler_response(user_response):
+        return False
+    if state.get("is_verification", False):
+        return is_confirmation(user_response)
+    return True
+
+def classify_intent(state: ConversationState, 
+                    current_question: Dict[str, Any], 
+                    user_response: str) -> str:
+    """
+    Classify the user's response into confusion, question, answer or correction.
+    """
+    # Trivial utterances are classified without an LLM call
+    if is_filler_response(user_response):
+        return "confusion"
     
     # Special handling for verification questions
     if state.get("is_verification", False):
-        chain = verification_intent_prompt | model
-        intent_response = chain.invoke({
+        if is_confirmation(user_response):
+            return "answer"
+        if is_go_back_request(user_response):
+            return "correction"
+        
+        # No conversation context: a yes/no-or-correction reply stands on its own,
+        # and without it identical verification prompts repeat across calls
+        intent_content = invoke_classifier(verification_intent_prompt, {
             "question_text": current_question["text"],
-            "user_response": user_response,
-            "conversation_context": conversation_context
+            "user_response": user_response
         })
         
-        verification_intent = intent_response.content.strip().lower()
-        
-        # Map verification intents to standard intents for the workflow
-        if verification_intent == "confirmation":
-            # User confirmed the data is correct
-            return {"intent": "answer"}
-        elif verification_intent == "correction":
-            # User provided a correction to the pre-filled data
-            return {"intent": "answer"} # Still treat as answer, entity extraction will handle it
-        elif verification_intent == "question":
-            return {"intent": "question"}
-        else:
-            return {"intent": "confusion"}
+        return VERIFICATION_INTENTS.get(first_word(intent_content), "confusion")
+    
+    # Normal intent classification for non-verification questions; the last two
+    # exchanges are enough to tell a correction from an answer
+    conversation_history = state.get("conversation_history", [])
+    conversation_context = "\n".join(f"{role}: {message}" for role, message in conversation_history[-CONTEXT_MESSAGES:])
     
-    # Normal intent classification for non-verification questions
-    chain = intent_classifier_prompt | model
-    intent_response = chain.invoke({
+    intent_content = invoke_classifier(intent_classifier_prompt, {
         "question_text": current_question["text"],
         "user_response": user_response,
         "conversation_context": conversation_context
     })
     
-    intent = intent_response.content.strip().lower()
+    intent = first_word(intent_content)
     
-    if intent not in ["confusion", "question", "answer", "correction"]:
-        intent = "confusion"
+    return intent if intent in VALID_INTENTS else "confusion"
+
+def invoke_classifier(prompt: ChatPromptTemplate, inputs: Dict[str, Any]) -> str:
+    """
+    Classify with the 8B model, queueing a 70B shadow comparison for uncached prompts.
+    """
+    return cached_invoke(intent_cache, prompt, get_chat_model(MODEL_NAME, TEMPERATURE), inputs, on_miss=queue_shadow_comparison)
+
+def queue_shadow_comparison(messages: List[BaseMessage], intent_content: str) -> None:
+    """
+    Queue a 70B re-classification of a fresh 8B answer while shadow evaluation is on.
+    """
+    if SHADOW_EVAL_TURNS and next(shadow_turns) < SHADOW_EVAL_TURNS:
+        shadow_executor.submit(compare_with_shadow_model, messages, first_word(intent_content))
+
+def compare_with_shadow_model(messages: List[BaseMessage], intent: str) -> None:
+    """
+    Log when the 70B model labels a prompt differently from the 8B model.
+    """
+    try:
+        shadow_intent = first_word(get_chat_model(SHADOW_MODEL_NAME, TEMPERATURE).invoke(messages).content)
+    except Exception as e:
+        logger.error("Shadow intent classification failed: %s", e)
+        return
     
-    return {"intent": intent} 
\ No newline at end of file
+    if shadow_intent != intent:
+        logger.warning("Intent disagreement: 8B=%s 70B=%s prompt=%r",
+                       intent, shadow_intent, messages[-1].content)
+
+def first_word(content: str) -> str:
+    """
+    Returns the lower-cased first word of a model response, or an empty string.
+    """
+    words = content[:32].split(None, 1)
+    return words[0].lower() if words else ""
@@ -7,9 +7,9 @@ It can also make inline corrections to previous answers without changing the flo
 """
 
 from typing import Dict, Any, List, Optional, Literal
-import os
+import logging
+from functools import lru_cache
 from dotenv import load_dotenv
-from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import PydanticOutputParser
 from pydantic import BaseModel, Field
@@ -17,13 +17,16 @@ from ..core.state import ConversationState, CorrectionDetails, CorrectionType
 from ..questions.questions import QUESTIONS
 from ..utils.question_utils import get_question_by_id, get_previous_question_id, get_readable_field_name
 from ..utils.extraction_utils import format_conversation_history
+from ._llm_cache import LRUCache
+from ._models import get_chat_model
 
 # Load environment variables
 load_dotenv()
-groq_api_key = os.getenv("GROQ_API_KEY")
+logger = logging.getLogger(__name__)
 
-model = ChatGroq(api_key=groq_api_key,
-                 model="llama-3.3-70b-versatile", temperature=0.1)
+# Clients are resolved through get_chat_model() when a node first runs, not at import
+MODEL_NAME = "llama-3.3-70b-versatile"
+TEMPERATURE = 0.1
 
 # Define the structured output schema for correction analysis
 
@@ -134,6 +137,59 @@ correction_analyzer_prompt = ChatPromptTemplate.from_template(CORRECTION_ANALYZE
     .partial(format_instructions=parser.get_format_instructions())
 
 
+@lru_cache(maxsize=None)
+def correction_analyzer_chain():
+    """Analyze correction intent using LLM with structured output parsing; composed once."""
+    return correction_analyzer_prompt | get_chat_model(MODEL_NAME, TEMPERATURE) | parser
+
+# Number of trailing history messages that take part in the cache key
+CACHE_HISTORY_WINDOW = 3
+
+# Parsed analyses keyed by (question ID, normalized response, recent history)
+correction_cache = LRUCache(maxsize=4096)
+
+
+def analyze_correction(current_question: Dict[str, Any],
+                       current_question_id: str,
+                       user_response: str,
+                       history: List) -> CorrectionAnalysis:
+    """
+    Ask the LLM whether the user is correcting a previous answer.
+
+    Short replies such as "yes", "no" or "go back" produce the same analysis
+    every time they are given for the same question, so results are cached
+    on the question, the normalized response and the last few messages.
+
+    Args:
+        current_question: The question currently being asked
+        current_question_id: The ID of that question
+        user_response: What the user said
+        history: The conversation history
+
+    Returns:
+        The parsed CorrectionAnalysis
+    """
+    cache_key = (
+        current_question_id,
+        (user_response or "").strip().lower(),
+        tuple(history[-CACHE_HISTORY_WINDOW:])
+    )
+    cached = correction_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    # Analyze correction intent using LLM with structured output parsing
+    correction_details = correction_analyzer_chain().invoke({
+        "current_question": current_question["text"],
+        "current_question_id": current_question_id,
+        "user_response": user_response,
+        "conversation_history": format_conversation_history(history)
+    })
+
+    correction_cache.set(cache_key, correction_details)
+    return correction_details
+
+
 def handle_redo_agent(state: ConversationState) -> Dict[str, Any]:
     """
     Intelligent agent that determines how to handle corrections based on user input.
@@ -144,20 +200,10 @@ def handle_redo_agent(state: ConversationState) -> Dict[str, Any]:
     history = state["conversation_history"]
     form_data = state.get("form_data", {})
 
-    # Format the conversation history
-    formatted_history = format_conversation_history(history)
-
-    # Analyze correction intent using LLM with structured output parsing
-    chain = correction_analyzer_prompt | model | parser
-
     try:
         # Try to get a structured response from the LLM
-        correction_details = chain.invoke({
-            "current_question": current_question["text"],
-            "current_question_id": current_question_id,
-            "user_response": user_response,
-            "conversation_history": formatted_history
-        })
+        correction_details = analyze_correction(
+            current_question, current_question_id, user_response, history)
 
         if correction_details.correction_type == "not_a_correction":
             return {
@@ -175,7 +221,7 @@ def handle_redo_agent(state: ConversationState) -> Dict[str, Any]:
             ack_msg = f"I've updated your {field_name} to '{correction_details.corrected_value}'. "
             full_response = f"{ack_msg}Now, {current_question['text']}"
 
-            updated_history = history + [("Assistant", full_response)]
+            updated_history = [("Assistant", full_response)]
 
             return {
                 "agent_response": full_response,
@@ -189,7 +235,7 @@ def handle_redo_agent(state: ConversationState) -> Dict[str, Any]:
             previous_question = get_question_by_id(previous_id)
 
             full_response = f"Let's go back to the previous question. {previous_question['text']}"
-            updated_history = history + [("Assistant", full_response)]
+            updated_history = [("Assistant", full_response)]
 
             return {
                 "agent_response": full_response,
@@ -213,7 +259,7 @@ def handle_redo_agent(state: ConversationState) -> Dict[str, Any]:
             ack_msg = f"Let's go back to update your {field_name}. "
             full_response = f"{ack_msg}{target_question['text']}"
 
-            updated_history = history + [("Assistant", full_response)]
+            updated_history = [("Assistant", full_response)]
 
             return {
                 "agent_response": full_response,
@@ -223,7 +269,7 @@ def handle_redo_agent(state: ConversationState) -> Dict[str, Any]:
             }
 
     except Exception as e:
-        print(f"Error in correction analysis: {e}")
+        logger.error("Error in correction analysis: %s", e)
 
     # If we reach here, either the LLM failed to produce a valid output or parsing failed
     return {
@@ -7,29 +7,30 @@ After 3 retry attempts, it will mark the question as incomplete and move on.
 """
 
 from typing import Dict, Any, Tuple, Optional, List
-import os
+import logging
+import zlib
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
 from ..core.state import ConversationState
+from ._llm_cache import LRUCache
 from ..questions.questions import QUESTIONS
 from ..utils.question_utils import get_question_by_id, get_next_question_id, get_readable_field_name
+from ._models import get_chat_model
 # from utils.tts import text_to_speech
 
 # Load environment variables
 load_dotenv()
-groq_api_key = os.getenv("GROQ_API_KEY")
+logger = logging.getLogger(__name__)
 
-model = ChatGroq(api_key=groq_api_key,
-                 model="llama-3.3-70b-versatile", temperature=0.2)
+# Clients are resolved through get_chat_model() when a node first runs, not at import
+MODEL_NAME = "llama-3.3-70b-versatile"
+TEMPERATURE = 0.2
 
 RETRY_PROMPT = """
 You are a helpful assistant for a real estate closing service.
-The user responded in a way that suggests they're confused, didn't understand, or provided an irrelevant response to the following question:
-
-Original question: {question_text}
-User's response: {user_response}
-Current retry attempt: {retry_count} of 3
+The user responded in a way that suggests they're confused, didn't understand, or provided an irrelevant response to the question given below.
 
 Your task is to politely rephrase the question and help the user provide a complete answer.
 
@@ -52,11 +53,14 @@ Keep your response concise and natural - just rephrase the question appropriatel
 Do NOT include "Retry attempt X:" in your response.
 """
 
+RETRY_PROMPT_INPUT = """
+Original question: {question_text}
+Current retry attempt: {retry_count} of 3
+"""
+
 NEXT_QUESTION_PROMPT = """
 You are a helpful assistant for a real estate closing service.
-The conversation is moving on to a new question in the form.
-
-Next question: {next_question_text}
+The conversation is moving on to a new question in the form, given below.
 
 IMPORTANT GUIDELINES:
 1. Present this question in a natural, conversational way
@@ -68,12 +72,89 @@ Do not mention that you're moving on or changing topics - simply ask the new que
 Your response should include only the new question presented in a friendly, conversational tone.
 """
 
-retry_prompt = ChatPromptTemplate.from_template(RETRY_PROMPT)
-next_question_prompt = ChatPromptTemplate.from_template(NEXT_QUESTION_PROMPT)
+NEXT_QUESTION_PROMPT_INPUT = """
+Next question: {next_question_text}
+"""
+
+retry_prompt = ChatPromptTemplate.from_messages([
+    ("system", RETRY_PROMPT),
+    ("human", RETRY_PROMPT_INPUT)
+])
+next_question_prompt = ChatPromptTemplate.from_messages([
+    ("system", NEXT_QUESTION_PROMPT),
+    ("human", NEXT_QUESTION_PROMPT_INPUT)
+])
+
+
+@lru_cache(maxsize=None)
+def retry_chain():
+    """Returns the retry chain, composed on first use."""
+    return retry_prompt | get_chat_model(MODEL_NAME, TEMPERATURE)
+
+
+@lru_cache(maxsize=None)
+def next_question_chain():
+    """Returns the next-question chain, composed on first use."""
+    return next_question_prompt | get_chat_model(MODEL_NAME, TEMPERATURE)
 
 # Maximum number of retry attempts before moving on
 MAX_RETRIES = 3
 
+# A rephrasing depends only on the question and the attempt number, so each
+# (question_id, retry_count) pair is generated once and reused for every caller
+retry_cache = LRUCache(maxsize=4096)
+
+# The hand-off to the next question after the last retry depends only on that question
+next_question_cache = LRUCache(maxsize=1024)
+
+# Phrases the next question in the background while the last retry is being asked
+next_question_prefetcher = ThreadPoolExecutor(max_workers=4)
+
+
+def get_retry_rephrasing(question_id: str, retry_count: int) -> str:
+    """
+    Return the rephrased question for a retry attempt, generating it on first use.
+    """
+    key = (question_id, retry_count)
+    agent_response = retry_cache.get(key)
+    if agent_response is None:
+        agent_response = retry_chain().invoke({
+            "question_text": get_question_by_id(question_id)["text"],
+            "retry_count": retry_count
+        }).content
+        retry_cache.set(key, agent_response)
+    return agent_response
+
+
+def get_next_question_phrasing(question_id: str) -> str:
+    """
+    Return the conversational phrasing of a question asked after giving up on the previous one.
+    """
+    agent_response = next_question_cache.get(question_id)
+    if agent_response is None:
+        agent_response = next_question_chain().invoke({
+            "next_question_text": get_question_by_id(question_id)["text"]
+        }).content
+        next_question_cache.set(question_id, agent_response)
+    return agent_response
+
+
+def warm_retry_cache() -> None:
+    """
+    Generate the rephrasing of every question for every retry attempt,
+    and its phrasing as the next question after a skipped one.
+    """
+    for question in QUESTIONS:
+        if question["id"] in ("welcome", "farewell"):
+            continue
+        try:
+            first_llm_retry = 2 if question.get("rephrase_variants") else 1
+            for retry_count in range(first_llm_retry, MAX_RETRIES):
+                get_retry_rephrasing(question["id"], retry_count)
+            get_next_question_phrasing(question["id"])
+        except Exception as e:
+            logger.error("Error warming retry rephrasing for %s: %s", question["id"], e)
+
 
 def handle_confusion_node(state: ConversationState) -> Dict[str, Any]:
     """
@@ -85,19 +166,17 @@ def handle_confusion_node(state: ConversationState) -> Dict[str, Any]:
 
     # Check if we're at the farewell - if so, immediately terminate
     if current_question_id == "farewell":
-        print("\nConversation complete. Thank you for using our service!")
+        logger.info("Conversation complete")
         return {"is_done": True}
 
-    current_question = get_question_by_id(current_question_id)
-    user_response = state.get("user_response", "")
-
     # Get or initialize retry counter for current question
-    form_data = state.get("form_data", {})
-    retries = form_data.get(f"{current_question_id}_retries", 0) + 1
-    form_data[f"{current_question_id}_retries"] = retries
+    retry_counts = dict(state.get("retries") or {})
+    retries = retry_counts.get(current_question_id, 0) + 1
+    retry_counts[current_question_id] = retries
 
     # If we've exceeded max retries, mark as incomplete and move on
     if retries >= MAX_RETRIES:
+        form_data = dict(state.get("form_data", {}))
         form_data[current_question_id] = "[INCOMPLETE]"
 
         next_question_id = get_next_question_id(current_question_id, form_data)
@@ -108,27 +187,20 @@ def handle_confusion_node(state: ConversationState) -> Dict[str, Any]:
             agent_response = farewell_question["text"]
 
             # Print the farewell directly
-            print(f"\nAssistant: {agent_response}")
-            print("\nConversation complete. Thank you for using our service!")
+            logger.debug("Assistant: %s", agent_response)
+            logger.info("Conversation complete")
 
             # Return with done flag
             return {
                 "agent_response": agent_response,
                 "current_question_id": "farewell",
                 "is_done": True,
-                "form_data": form_data
+                "form_data": form_data,
+                "retries": retry_counts
             }
 
-        next_question = get_question_by_id(next_question_id)
-
-        chain = next_question_prompt | model
-        next_response = chain.invoke({
-            "next_question_text": next_question["text"]
-        })
-
-        agent_response = next_response.content
-        history = state["conversation_history"] + \
-            [("Assistant", agent_response)]
+        agent_response = get_next_question_phrasing(next_question_id)
+        history = [("Assistant", agent_response)]
 
         # text_to_speech(agent_response, voice="Fritz-PlayAI")
 
@@ -137,19 +209,26 @@ def handle_confusion_node(state: ConversationState) -> Dict[str, Any]:
             "agent_response": agent_response,
             "conversation_history": history,
             "current_question_id": next_question_id,
-            "form_data": form_data
+            "form_data": form_data,
+            "retries": retry_counts
         }
 
-    # Otherwise, retry with a rephrased question
-    chain = retry_prompt | model
-    retry_response = chain.invoke({
-        "question_text": current_question["text"],
-        "user_response": user_response,
-        "retry_count": retries
-    })
-
-    agent_response = retry_response.content
-    history = state["conversation_history"] + [("Assistant", agent_response)]
+    # One more confused response moves on, so have the next question's phrasing ready
+    if retries == MAX_RETRIES - 1:
+        skipped_form_data = {**state.get("form_data", {}), current_question_id: "[INCOMPLETE]"}
+        next_question_id = get_next_question_id(current_question_id, skipped_form_data)
+        if next_question_id is not None:
+            next_question_prefetcher.submit(get_next_question_phrasing, next_question_id)
+
+    # Otherwise, retry with a rephrased question; a first retry uses one of the
+    # question's hand-written rephrasings when it has them
+    rephrase_variants = get_question_by_id(current_question_id).get("rephrase_variants")
+    if retries == 1 and rephrase_variants:
+        user_response = state.get("user_response") or ""
+        agent_response = rephrase_variants[zlib.crc32(user_response.encode()) % len(rephrase_variants)]
+    else:
+        agent_response = get_retry_rephrasing(current_question_id, retries)
+    history = [("Assistant", agent_response)]
 
     # text_to_speech(agent_response, voice="Fritz-PlayAI")
 
@@ -157,5 +236,5 @@ def handle_confusion_node(state: ConversationState) -> Dict[str, Any]:
     return {
         "agent_response": agent_response,
         "conversation_history": history,
-        "form_data": form_data
+        "retries": retry_counts
     }
@@ -1,2 +1,3 @@
 from .state import *
 from .workflow import *
+from .sessions import *
@@ -0,0 +1,137 @@
+"""
+Call Session Store
+
+This module keeps the ConversationState of every in-progress call, keyed by
+the Twilio CallSid.
+
+By default sessions live in process memory. When REDIS_URL is set they are
+stored in Redis instead, so this copy of the state outlives a worker and is
+visible to every worker.
+
+Redis alone does not let another worker carry on a call: the LangGraph
+checkpoint that Command(resume=...) continues from lives in the graph's
+checkpointer, which is process-local unless CHECKPOINT_DB points the workers
+on one host at a shared SQLite file. Webhooks for a call must still reach
+a process (or host) that holds its checkpoint.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import orjson
+
+from .state import ConversationState
+
+logger = logging.getLogger(__name__)
+
+# Twilio ends a call after 4 hours at most, so nothing older is still needed
+SESSION_TTL_SECONDS = int(os.getenv("CALL_SESSION_TTL", 4 * 60 * 60))
+
+# A turn record outlives its turn only until Twilio's next poll; one left behind
+# by a caller who hung up, or by a worker that died mid-turn, expires after this
+PENDING_TURN_TTL_SECONDS = int(os.getenv("PENDING_TURN_TTL", 120))
+
+
+class InMemorySessionStore:
+    """
+    Process-local session store, used when Redis is not configured.
+
+    Sessions expire after ttl seconds like their Redis counterparts, and the
+    oldest are dropped beyond maxsize, so abandoned calls do not pile up.
+    """
+
+    def __init__(self, ttl: int = SESSION_TTL_SECONDS, maxsize: int = 10_000):
+        self._sessions: OrderedDict[str, tuple[float, ConversationState]] = OrderedDict()
+        self._ttl = ttl
+        self._maxsize = maxsize
+        self._lock = threading.Lock()
+
+    def get(self, call_sid: str, default: Optional[ConversationState] = None) -> Optional[ConversationState]:
+        with self._lock:
+            entry = self._sessions.get(call_sid)
+            if entry is None:
+                return default
+            expires_at, state = entry
+            if expires_at <= time.monotonic():
+                del self._sessions[call_sid]
+                return default
+            return state
+
+    def set(self, call_sid: str, state: ConversationState) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._sessions.pop(call_sid, None)
+            self._sessions[call_sid] = (now + self._ttl, state)
+            # Entries are in expiry order, so expired ones are at the front
+            while self._sessions:
+                oldest_sid, (expires_at, _) = next(iter(self._sessions.items()))
+                if expires_at > now and len(self._sessions) <= self._maxsize:
+                    break
+                del self._sessions[oldest_sid]
+
+    def delete(self, call_sid: str) -> None:
+        with self._lock:
+            self._sessions.pop(call_sid, None)
+
+
+class RedisSessionStore:
+    """Session store shared by every worker through Redis."""
+
+    def __init__(self, redis_url: str, ttl: int = SESSION_TTL_SECONDS, prefix: str = "call"):
+        import redis
+
+        pool = redis.BlockingConnectionPool.from_url(redis_url, max_connections=32)
+        self._redis = redis.Redis(connection_pool=pool)
+        self._ttl = ttl
+        self._prefix = prefix
+
+    def _key(self, call_sid: str) -> str:
+        return f"{self._prefix}:{call_sid}"
+
+    def get(self, call_sid: str, default: Optional[ConversationState] = None) -> Optional[ConversationState]:
+        raw = self._redis.get(self._key(call_sid))
+        if raw is None:
+            return default
+        state = orjson.loads(raw)
+        # JSON has no tuples; history entries are (speaker, message) pairs
+        if "conversation_history" in state:
+            state["conversation_history"] = [tuple(entry) for entry in state["conversation_history"]]
+        return state
+
+    def set(self, call_sid: str, state: ConversationState) -> None:
+        self._redis.set(self._key(call_sid), orjson.dumps(state), ex=self._ttl)
+
+    def delete(self, call_sid: str) -> None:
+        self._redis.delete(self._key(call_sid))
+
+
+def create_session_store(prefix: str = "call", ttl: int = SESSION_TTL_SECONDS):
+    """
+    Create a per-call store for this process.
+
+    Args:
+        prefix: Redis key prefix, so several stores can share one Redis
+        ttl: Seconds after which an entry expires
+
+    Returns:
+        A RedisSessionStore if REDIS_URL is set, otherwise an InMemorySessionStore
+    """
+    redis_url = os.getenv("REDIS_URL")
+    if redis_url:
+        return RedisSessionStore(redis_url, ttl=ttl, prefix=prefix)
+    return InMemorySessionStore(ttl=ttl)
+
+
+if os.getenv("REDIS_URL") and not os.getenv("CHECKPOINT_DB"):
+    logger.warning("REDIS_URL is set but graph checkpoints are process-local; "
+                   "a call can only be continued by the process that started it")
+
+call_sessions = create_session_store()
+
+# CallSid -> outcome of the turn being processed ({"status": "running" | "done" | "failed", ...}),
+# so /in-call/poll can find a slow turn's reply whichever worker it reaches
+pending_turns = create_session_store(prefix="turn", ttl=PENDING_TURN_TTL_SECONDS)
@@ -2,9 +2,25 @@
 State definition for the LangGraph workflow.
 """
 
-from typing import TypedDict, List, Tuple, Dict, Any, Optional
+from typing import TypedDict, List, Tuple, Dict, Any, Optional, Annotated
 from enum import Enum, auto
 
+# Only the most recent turns are kept; prompts never look further back than this
+MAX_HISTORY_LENGTH = 40
+
+def append_history(history: List[Tuple[str, str]], *entries: Tuple[str, str]) -> List[Tuple[str, str]]:
+    """
+    Returns a new history with entries appended, trimmed to the last MAX_HISTORY_LENGTH messages.
+    """
+    return (list(history) + list(entries))[-MAX_HISTORY_LENGTH:]
+
+def merge_history(history: List[Tuple[str, str]], new_entries: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    """
+    Reducer for conversation_history: nodes return only their new messages and
+    LangGraph appends them to the stored history.
+    """
+    return append_history(history, *new_entries)
+
 class IntentType(str, Enum):
     """Types of user response intents."""
     CONFUSION = "confusion"
@@ -31,7 +47,7 @@ class ConversationState(TypedDict):
     
     form_data: Dict[str, Any]
     
-    conversation_history: List[Tuple[str, str]] # List of (speaker, message)
+    conversation_history: Annotated[List[Tuple[str, str]], merge_history] # List of (speaker, message); updates are appended
     
     current_question_id: str
     
@@ -43,4 +59,8 @@ class ConversationState(TypedDict):
     
     is_done: bool
     
-    is_verification: Optional[bool] 
\ No newline at end of file
+    is_verification: Optional[bool]
+    
+    retries: Dict[str, int] # Question ID -> confused responses so far, kept out of form_data
+    
+    speculative_extraction: Optional[Dict[str, Any]] # Extraction run alongside intent classification 
\ No newline at end of file
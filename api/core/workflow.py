@@ -16,9 +16,10 @@ from ..agents.retry import handle_confusion_node
 from ..agents.deviation_answer import handle_question_node
 from ..agents.entity_extraction import extract_entities_node
 from ..agents.redo_agent import handle_redo_agent
-from langchain_groq import ChatGroq
 from dotenv import load_dotenv
 import os
+import sqlite3
+import logging
 
 
 from langgraph.types import Command, interrupt
@@ -32,33 +33,17 @@ from flask import (
 
 # Load environment variables
 load_dotenv()
-groq_api_key = os.getenv("GROQ_API_KEY")
-model = ChatGroq(api_key=groq_api_key, model="llama-3.3-70b-versatile", temperature=0.1)
+logger = logging.getLogger(__name__)
 
 
-def format_form_summary(form_data: Dict[str, Any]) -> str:
-    """Format the form data for display in the prompt"""
-    if not form_data:
-        return "No information collected yet."
-    
-    summary = []
-    for key, value in form_data.items():
-        if value and not key.endswith("_retries"):  # Only include fields that have been filled
-            summary.append(f"{key}: {value}")
-    
-    if not summary:
-        return "No information collected yet."
-    
-    return "\n".join(summary)
-
 def get_user_input_node(state: ConversationState) -> Dict[str, Any]:
     """Node to get user input using keyboard input."""
     last_agent_response = state.get("agent_response")
     if last_agent_response:
-        print(f"\nAssistant: {last_agent_response}")
+        logger.debug("Assistant: %s", last_agent_response)
     
     if state.get("is_done", False):
-        print("\nConversation complete. Thank you for using our service!")
+        logger.info("Conversation complete")
         return {}
     
     # Comment out speech-to-text
@@ -66,12 +51,12 @@ def get_user_input_node(state: ConversationState) -> Dict[str, Any]:
     
     #interrupt langgraph workflow until user provides response
     user_input = interrupt(value = last_agent_response)
-    print(f"> Received an input from the interrupt: {user_input}")
+    logger.debug("Received an input from the interrupt: %s", user_input)
     
     # No need to print the input again as it's already visible
     # print(f"\nYou: {user_input}")
     
-    history = state["conversation_history"] + [("User", user_input)]
+    history = [("User", user_input)]
     
     return {"user_response": user_input, "conversation_history": history, "agent_response": None}
 
@@ -117,6 +102,28 @@ def route_after_correction(state: ConversationState) -> str:
         # Something went wrong, fall back to asking the current question
         return "ask_question"
 
+def create_checkpointer():
+    """
+    Create the checkpointer that stores each call's graph state between webhooks.
+    
+    Set CHECKPOINT_DB to a SQLite file path so every worker process on the host
+    shares checkpoints and they survive restarts. The file is on local disk, so
+    it does not help across hosts or on serverless deployments (Vercel), where
+    each webhook may run in a separate instance with its own filesystem.
+    
+    Returns:
+        A SqliteSaver if CHECKPOINT_DB is set, otherwise a process-local MemorySaver
+    """
+    checkpoint_db = os.getenv("CHECKPOINT_DB")
+    if checkpoint_db:
+        from langgraph.checkpoint.sqlite import SqliteSaver
+        
+        # Turns run on worker threads, so the connection is shared across them
+        connection = sqlite3.connect(checkpoint_db, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        return SqliteSaver(connection)
+    return MemorySaver()
+
 def create_intake_workflow():
     """
     Creates and returns the compiled LangGraph workflow for the intake form.
@@ -190,8 +197,7 @@ def create_intake_workflow():
     
     workflow.add_edge("extract_entities", "ask_question")
     
-    memory = MemorySaver()
-    app = workflow.compile(checkpointer=memory)
+    app = workflow.compile(checkpointer=create_checkpointer())
     
     return app
 
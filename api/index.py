@@ -1,19 +1,43 @@
-from .core import ConversationState, intake_workflow
-from .utils import introduction, text_to_speech, convert_to_twiml
+from .core import ConversationState, intake_workflow, call_sessions, pending_turns, merge_history
+from .agents.retry import warm_retry_cache
+from .utils import (
+    introduction,
+    text_to_speech_sentences,
+    convert_to_twiml,
+    get_twilio_client,
+    warm_cache,
+    prefetch_speech,
+    prefetch_sentences,
+    prefetch_response,
+    get_question_by_id,
+    stream_audio,
+    WELCOME_MESSAGE,
+    OrjsonProvider
+)
 from flask import (
     Flask,
     request,
     jsonify,
     render_template,
     url_for,
-    send_from_directory
+    send_from_directory,
+    make_response,
+    Response
 )
-from twilio.twiml.voice_response import VoiceResponse, Gather, Say, Hangup
-from twilio.rest import Client
-from copy import deepcopy
-from langgraph.types import Command, Interrupt
+from twilio.twiml.voice_response import VoiceResponse, Gather
+from werkzeug.middleware.proxy_fix import ProxyFix
+from langgraph.types import Command
 from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import concurrent.futures
+from logging.handlers import QueueHandler, QueueListener
+import atexit
+import logging
+import queue
+import re
 import tempfile
+import threading
 import os
 import sys
 
@@ -22,26 +46,94 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 
 load_dotenv()
-app = Flask(__name__)
+# Request threads only enqueue log records; a listener thread does the stdout I/O
+log_queue = queue.SimpleQueue()
+log_handler = logging.StreamHandler()
+log_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+log_listener = QueueListener(log_queue, log_handler)
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO"),
+                    handlers=[QueueHandler(log_queue)])
+log_listener.start()
+atexit.register(log_listener.stop)
+logger = logging.getLogger(__name__)
 
-CACHE_DIR = os.path.join(tempfile.gettempdir(), "tts_cache")
+app = Flask(__name__)
+app.json = OrjsonProvider(app)
+# Trust the proxy's X-Forwarded-* headers so external URLs use the public
+# scheme and host that Twilio actually called
+app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1)
+app.config["PREFERRED_URL_SCHEME"] = "https"
 
-config = {
-    "recursion_limit": 500,
-    "configurable": {"thread_id": "intake-thread-1"}
-}
-INITIAL_STATE_TEMPLATE: ConversationState = {
-    "form_data": {},
-    "conversation_history": [],
-    "current_question_id": "welcome",
-    "user_response": None,
-    "intent": None,
-    "agent_response": None,
-    "twiml": None,
-    "is_done": False
-}
+TWILIO_PHONE_NUMBER = os.environ.get("TWILIO_PHONE_NUMBER")
 
-call_sessions: dict[str, ConversationState] = {}
+CACHE_DIR = os.path.join(tempfile.gettempdir(), "tts_cache")
+AUDIO_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Cached audio is named by the sha256 of its text, voice and speed
+AUDIO_FILENAME = re.compile(r"^[0-9a-f]{64}\.mp3$")
+
+# Behind nginx, set AUDIO_ACCEL_REDIRECT to an internal location aliased to
+# CACHE_DIR (e.g. "/_audio_internal/") so nginx sends the MP3 itself.
+# Behind Apache/lighttpd, USE_X_SENDFILE=1 does the same via X-Sendfile.
+AUDIO_ACCEL_REDIRECT = os.getenv("AUDIO_ACCEL_REDIRECT")
+app.use_x_sendfile = os.getenv("USE_X_SENDFILE") == "1"
+
+# Phrases that are always spoken verbatim can be synthesized once at startup.
+# Each worker and cold start pays for the TTS calls, so this is opt-in
+if os.getenv("WARM_TTS_CACHE") == "1":
+    warm_cache([WELCOME_MESSAGE])
+
+    # Workflow responses that are not rephrased by the LLM. The farewell in
+    # particular is long and is the last thing every caller hears.
+    prefetch_speech([
+        get_question_by_id("welcome")["text"],
+        get_question_by_id("farewell")["text"],
+        "Let me ask that question again."
+    ])
+
+# Retry rephrasings cost one LLM call per question and attempt, so generating
+# them all up front is opt-in
+if os.getenv("WARM_RETRY_CACHE") == "1":
+    threading.Thread(target=warm_retry_cache, daemon=True).start()
+
+
+def workflow_config(call_sid):
+    """Returns the graph config for a call; each call has its own checkpoint thread."""
+    return {
+        "recursion_limit": 500,
+        "configurable": {"thread_id": f"call-{call_sid}"}
+    }
+
+
+def new_state() -> ConversationState:
+    """Returns a fresh ConversationState for a call that has no session yet."""
+    return {
+        "form_data": {},
+        "retries": {},
+        "conversation_history": [],
+        "current_question_id": "welcome",
+        "user_response": None,
+        "intent": None,
+        "agent_response": None,
+        "twiml": None,
+        "is_done": False,
+        "speculative_extraction": None
+    }
+
+
+# Nodes whose LLM output is spoken verbatim; their tokens are fed to TTS as they stream
+STREAMED_NODES = {"ask_question", "handle_question", "handle_confusion"}
+
+# Longest time /in-call waits for a turn before asking Twilio to poll for it
+TURN_DEADLINE_SECONDS = float(os.getenv("TURN_DEADLINE_SECONDS", 5))
+
+# Pause (in seconds) Twilio plays between two polls of a pending turn
+TURN_POLL_PAUSE_SECONDS = 1
+
+turn_executor = ThreadPoolExecutor(max_workers=8)
+
+# Spoken when there is no reply to give: the turn failed, or its record is gone
+TURN_ERROR_MESSAGE = "Sorry, something went wrong on our side. Could you please repeat your answer?"
+TURN_LOST_MESSAGE = "Sorry, I didn't catch that. Could you please repeat your answer?"
 
 
 @app.route('/')
@@ -51,28 +143,216 @@ def home():
 
 @app.route('/call', methods=['POST'])
 def call():
-    from_number = os.environ.get("TWILIO_PHONE_NUMBER")
     # Get the phone number from the request
     to_number = request.form.get('phone_number')
 
     if not to_number:
         return jsonify({"error": "Phone number is required"}), 400
 
-    account_sid = os.environ["TWILIO_ACCOUNT_SID"]
-    auth_token = os.environ["TWILIO_AUTH_TOKEN"]
-    client = Client(account_sid, auth_token)
+    client = get_twilio_client()
 
     call = client.calls.create(
         twiml=introduction(),
         to=to_number,
-        from_=from_number
+        from_=TWILIO_PHONE_NUMBER
     )
 
-    # print(f"call id: {call.sid}")
     return jsonify({"status": "success",
                     "message": "Calling {to_number} now..."}), 200
 
 
+def apply_update(state, update):
+    """
+    Merges a node's update into the local copy of the state, the way the graph does.
+    """
+    if "conversation_history" in update:
+        update = {**update, "conversation_history": merge_history(
+            state.get("conversation_history", []), update["conversation_history"])}
+    state.update(update)
+
+
+def run_workflow(call_sid, workflow_input, state):
+    """
+    Runs the intake workflow for one turn and persists the resulting state.
+
+    Returns:
+        (question, done): The text to speak next and whether the call is over
+    """
+    question = ""
+    done = False
+    streamed_text = ""
+    streamed_message_id = None
+    spoken_response = state.get("agent_response")
+    interrupted = False
+    for mode, event in intake_workflow.stream(workflow_input, config=workflow_config(call_sid),
+                                              stream_mode=["updates", "messages"]):
+        if mode == "messages":
+            # Synthesize each sentence as soon as the LLM finishes it
+            message, metadata = event
+            if metadata.get("langgraph_node") in STREAMED_NODES:
+                if message.id != streamed_message_id:
+                    streamed_message_id = message.id
+                    streamed_text = ""
+                streamed_text = prefetch_sentences(streamed_text + message.content)
+            continue
+
+        # Each event holds only what the node that just ran returned
+        for node, update in event.items():
+            if node == "__interrupt__":                   # ← interrupt fired
+                # first (and only) Interrupt
+                question = update[0].value
+                interrupted = True
+                continue
+            if not update:
+                continue
+
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("%s -> %r", node, update)
+            apply_update(state, update)
+            # Start the audio as soon as a node responds; the graph still has to
+            # record the turn and reach the interrupt before this function returns
+            if update.get("agent_response") and update["agent_response"] != spoken_response:
+                spoken_response = update["agent_response"]
+                prefetch_response(spoken_response)
+            if update.get("is_done"):
+                done = True
+
+    if not interrupted:
+        question = state.get("agent_response") or ""
+
+    if done:
+        # The call hangs up after this reply, so its state is no longer needed
+        call_sessions.delete(call_sid)
+    else:
+        call_sessions.set(call_sid, state)
+    return question, done
+
+
+@lru_cache(maxsize=32)
+def _external_url(endpoint, host_url):
+    return url_for(endpoint, _external=True)
+
+
+def external_url(endpoint):
+    """
+    Absolute URL for an argument-less endpoint, built once per host.
+
+    Twilio webhooks always arrive on the same public host, so the routing
+    lookup and URL assembly only run on the first request.
+    """
+    return _external_url(endpoint, request.host_url)
+
+
+def pause_and_poll():
+    """TwiML that keeps the caller on the line while a turn is still running."""
+    response = VoiceResponse()
+    response.pause(length=TURN_POLL_PAUSE_SECONDS)
+    response.redirect(external_url('in_call_poll'), method='POST')
+    return convert_to_twiml(response)
+
+
+def build_reply(question, done, in_call_url, reprompt=None):
+    """
+    Builds the TwiML for one turn: speak the question inside a speech
+    Gather, then either hang up or loop back to /in-call.
+
+    Args:
+        question (str): Text to speak, split into sentences for TTS
+        done (bool): Whether the workflow has finished the intake
+        in_call_url (str): Absolute /in-call URL, built once per request
+        reprompt (str): Optional line spoken when the caller said nothing
+    """
+    response = VoiceResponse()
+    gather = Gather(
+        input='speech',
+        action=in_call_url,
+        language='en-US',
+        method='POST',
+        speechTimeout='auto'
+    )
+    if question:
+        for sentence, audio_url in text_to_speech_sentences(question):
+            if audio_url:
+                gather.play(audio_url)
+            else:
+                # TTS failed or is too slow: let Twilio speak the sentence
+                gather.say(sentence)
+    response.append(gather)
+
+    if done:
+        response.hangup()
+        return response
+
+    if reprompt:
+        response.say(reprompt)
+    response.redirect(in_call_url, method='POST')
+    return response
+
+
+def reprompt_reply(message):
+    """
+    TwiML that asks the caller to answer again without starting a turn.
+
+    If the caller stays silent, Twilio comes back to /in-call/poll rather
+    than /in-call, so silence is never fed into the workflow as an answer.
+    """
+    response = VoiceResponse()
+    gather = Gather(
+        input='speech',
+        action=external_url('in_call'),
+        language='en-US',
+        method='POST',
+        speechTimeout='auto'
+    )
+    gather.say(message)
+    response.append(gather)
+    response.redirect(external_url('in_call_poll'), method='POST')
+    return convert_to_twiml(response)
+
+
+def run_turn(call_sid, workflow_input, state, reprompt=None):
+    """
+    Runs one turn and records its outcome in pending_turns, where
+    /in-call/poll finds it on whichever worker Twilio reaches.
+
+    Returns:
+        The turn record: {"status": "done", "question", "done", "reprompt"} or {"status": "failed"}
+    """
+    try:
+        question, done = run_workflow(call_sid, workflow_input, state)
+        outcome = {"status": "done", "question": question, "done": done, "reprompt": reprompt}
+    except Exception:
+        logger.exception("Turn failed for call %s", call_sid)
+        outcome = {"status": "failed"}
+    pending_turns.set(call_sid, outcome)
+    return outcome
+
+
+def reply_to_turn(outcome):
+    """TwiML for a finished turn record."""
+    if outcome["status"] != "done":
+        return reprompt_reply(TURN_ERROR_MESSAGE)
+    return convert_to_twiml(build_reply(
+        outcome["question"], outcome["done"], external_url('in_call'), outcome["reprompt"]))
+
+
+def respond_to_turn(call_sid, turn):
+    """
+    Waits at most TURN_DEADLINE_SECONDS for a turn to finish.
+
+    Slow turns keep running in the background and Twilio is asked to poll
+    /in-call/poll for the result, so the webhook itself always answers
+    well within Twilio's timeout.
+    """
+    try:
+        outcome = turn.result(timeout=TURN_DEADLINE_SECONDS)
+    except concurrent.futures.TimeoutError:
+        return pause_and_poll()
+
+    pending_turns.delete(call_sid)
+    return reply_to_turn(outcome)
+
+
 @app.route('/in-call', methods=['POST'])
 def in_call():
     if request.method != 'POST':
@@ -83,141 +363,83 @@ def in_call():
         return "Missing CallSid", 400
 
     # fetch existing state or start fresh
-    state: ConversationState = call_sessions.get(
-        call_sid, deepcopy(INITIAL_STATE_TEMPLATE))
-    audio_url = ""
-    question = ""
-    if 'Digits' in request.form and request.form['Digits']:
-
-        # stop as soon as we have TwiML to speak
-        twiml_xml = None
-
-        print("enter first stream")
-        for event in intake_workflow.stream(state, config=config, stream_mode="values"):
-            state.update(event)
-            print("---- next node ------")
-            print(event)
-            print("----------------")
-            if "__interrupt__" in event:                      # ← interrupt fired
-                # first (and only) Interrupt
-                interrupt = event["__interrupt__"][0]
-                question = interrupt.value
-            else:
-                question = event["agent_response"]
-
-            print(question)
-
-        audio_url = text_to_speech(question)
-        response = VoiceResponse()
-        gather = Gather(
-            input='speech',
-            action=url_for('in_call'),
-            language='en-US',
-            method='POST',
-            speechTimeout='auto'
-        )
-        # gather.say(question)
-        gather.play(audio_url)
-        response.append(gather)
-        return convert_to_twiml(response)
-
-    elif 'SpeechResult' in request.form and request.form['SpeechResult']:
-        user_reponse = request.form['SpeechResult']
-        command = Command(resume=user_reponse)
-        done = False
-
+    state: ConversationState = call_sessions.get(call_sid) or new_state()
+    reprompt = None
+
+    if request.form.get('Digits'):
+        # First turn: start the workflow from the stored state
+        logger.debug("enter first stream")
+        workflow_input = state
+    else:
+        user_response = request.form.get('SpeechResult')
+        if not user_response:  # No input received
+            user_response = "what is the weather"
+            reprompt = "We did not receive a response, please try again."
         if state["current_question_id"] == 'farewell':
-            command = Command(resume="okay")
-
-        for event in intake_workflow.stream(command, config=config, stream_mode="values"):
-            print("---- next node ------")
-            print(event)
-            print("----------------")
-            state.update(event)
-            if event.get("is_done"):
-                done = True
-            if "__interrupt__" in event:                      # ← interrupt fired
-                # first (and only) Interrupt
-                interrupt = event["__interrupt__"][0]
-                question = interrupt.value
-            else:
-                question = event["agent_response"]
-
-        call_sessions[call_sid] = state
-        response = VoiceResponse()
-        gather = Gather(
-            input='speech',
-            action=url_for('in_call'),
-            language='en-US',
-            method='POST',
-            speechTimeout='auto'
-        )
-        # gather.say(question)
-        if question:
-            audio_url = text_to_speech(question)
-            gather.play(audio_url)
-        response.append(gather)
-        response.redirect(url_for('in_call', _external=True), method='POST')
-
-        if done:
-            response.hangup()
-
-        return convert_to_twiml(response)
-    else:  # No input received
-        user_response = "what is the weather"
-        command = Command(resume=user_response)
-        done = False
+            user_response = "okay"
+        workflow_input = Command(resume=user_response)
 
-        if state["current_question_id"] == 'farewell':
-            command = Command(resume="okay")
-
-        for event in intake_workflow.stream(command, config=config, stream_mode="values"):
-            print("---- next node ------")
-            print(event)
-            print("----------------")
-            state.update(event)
-            if event.get("is_done"):
-                done = True
-            if "__interrupt__" in event:
-                interrupt = event["__interrupt__"][0]
-                question = interrupt.value
-            else:
-                question = event["agent_response"]
-
-        call_sessions[call_sid] = state
-        response = VoiceResponse()
-        gather = Gather(
-            input='speech',
-            action=url_for('in_call'),
-            language='en-US',
-            method='POST',
-            speechTimeout='auto'
-        )
-        if question:
-            audio_url = text_to_speech(question)
-            gather.play(audio_url)
-        if done:
-            print("DONE")
-            response.hangup()
-        response.append(gather)
-        response.say("We did not receive a response, please try again.")
-        response.redirect(url_for('in_call', _external=True), method='POST')
-
-        return convert_to_twiml(response)
+    pending_turns.set(call_sid, {"status": "running"})
+    turn = turn_executor.submit(run_turn, call_sid, workflow_input, state, reprompt)
+    return respond_to_turn(call_sid, turn)
+
+
+@app.route('/in-call/poll', methods=['POST'])
+def in_call_poll():
+    """
+    Twilio is redirected here while a turn is still being processed.
+    Returns the turn's TwiML once it is ready, otherwise pauses again.
+    Never starts a turn itself.
+    """
+    call_sid = request.form.get("CallSid")
+    outcome = pending_turns.get(call_sid) if call_sid else None
+    if outcome is None:
+        # No record of a turn (it expired, or the worker running it died)
+        return reprompt_reply(TURN_LOST_MESSAGE)
+
+    if outcome["status"] == "running":
+        return pause_and_poll()
+
+    pending_turns.delete(call_sid)
+    return reply_to_turn(outcome)
 
 
 @app.route("/audio/<path:filename>")
 def serve_audio(filename):
     """
     Twilio issues a GET to this endpoint when it sees <Play>...</Play>.
-    We stream back the MP3 from CACHE_DIR.
+    We stream back the MP3 from CACHE_DIR, or the partial .part file while
+    the TTS vendor is still producing it, whichever worker started it.
     """
-    return send_from_directory(
+    # Only content-hash names are ever handed out; rejecting everything else
+    # keeps raw paths out of the filesystem checks and X-Accel-Redirect
+    if not AUDIO_FILENAME.fullmatch(filename):
+        return "Not found", 404
+
+    is_cached = os.path.exists(os.path.join(CACHE_DIR, filename))
+    if not is_cached:
+        chunks = stream_audio(filename)
+        if chunks is not None:
+            # Still being synthesized: the bytes are not final yet, don't cache
+            return Response(chunks, mimetype="audio/mpeg",
+                            headers={"Cache-Control": "no-store"})
+
+    if AUDIO_ACCEL_REDIRECT and is_cached:
+        response = make_response("")
+        response.headers["X-Accel-Redirect"] = f"{AUDIO_ACCEL_REDIRECT.rstrip('/')}/{filename}"
+        response.headers["Content-Type"] = "audio/mpeg"
+        response.headers["Cache-Control"] = AUDIO_CACHE_CONTROL
+        return response
+
+    response = send_from_directory(
         CACHE_DIR,
         filename,
         mimetype="audio/mpeg",
         conditional=True            # adds ETag / range support
     )
+    # Filenames are content hashes, so a given URL never changes
+    response.headers["Cache-Control"] = AUDIO_CACHE_CONTROL
+    return response
 
 
 if __name__ == '__main__':
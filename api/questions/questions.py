@@ -20,48 +20,88 @@ QUESTIONS = [
     {
         "id": "applicant_first_name",
         "text": "Please tell me your first name. Feel free to spell it if you prefer.",
+        "rephrase_variants": [
+            "What is your first name? You can spell it out if that's easier.",
+            "Could you tell me your first name, please?",
+            "Let's start with your first name. What is it?"
+        ],
         "required": True,
         "next": "applicant_last_name"
     },
     {
         "id": "applicant_last_name",
         "text": "Now your last name.",
+        "rephrase_variants": [
+            "What is your last name? Feel free to spell it.",
+            "And could you tell me your last name, please?",
+            "What is your family name, or surname?"
+        ],
         "required": True,
         "next": "applicant_dob"
     },
     {
         "id": "applicant_dob",
         "text": "What is your date of birth?",
+        "rephrase_variants": [
+            "When were you born? Please include the month, day and year.",
+            "Could you tell me your full date of birth, with the month, day and year?",
+            "What is your birthday, including the year?"
+        ],
         "required": True,
         "next": "applicant_first_time_buyer"
     },
     {
         "id": "applicant_first_time_buyer",
         "text": "Are you a first-time homebuyer? This means you have never purchased any property anywhere in the world.",
+        "rephrase_variants": [
+            "Have you ever bought a property before, anywhere in the world? If not, you're a first-time homebuyer.",
+            "Is this the first property you have ever purchased, in any country?",
+            "Just to check, have you never owned or bought a home anywhere before? A yes or no is fine."
+        ],
         "required": True,
         "next": "applicant_citizenship"
     },
     {
         "id": "applicant_citizenship",
         "text": "Are you a Canadian Citizen or Permanent Resident? Please specify.",
+        "rephrase_variants": [
+            "Are you a Canadian citizen, a permanent resident, or neither?",
+            "What is your status in Canada: citizen, permanent resident, or something else?",
+            "Could you tell me if you are a Canadian citizen or a permanent resident?"
+        ],
         "required": True,
         "next": "applicant_decision_making"
     },
     {
         "id": "applicant_decision_making",
         "text": "Do you acknowledge that you are fully able to understand and make decisions on your own?",
+        "rephrase_variants": [
+            "Can you confirm that you are able to understand and make your own decisions about this closing? A yes or no is fine.",
+            "Do you confirm that you can make decisions about this transaction on your own?",
+            "Are you comfortable confirming that you understand this process and can make your own decisions?"
+        ],
         "required": True,
         "next": "transaction_type"
     },
     {
         "id": "transaction_type",
         "text": "Are you Purchasing, Selling or Refinancing your property?",
+        "rephrase_variants": [
+            "Are you buying, selling, or refinancing a property?",
+            "Is this closing for a purchase, a sale, or a refinance?",
+            "What kind of transaction is this: purchasing, selling, or refinancing?"
+        ],
         "required": True,
         "next": lambda state: "property_construction_status" if state.get("transaction_type", "").lower() == "purchasing" else "property_type"
     },
     {
         "id": "property_construction_status",
         "text": "Is the property already built or it is a pre-construction purchase?",
+        "rephrase_variants": [
+            "Is the property already built, or are you buying it before construction is finished?",
+            "Is this an existing home, or a pre-construction purchase?",
+            "Has the property already been built, or is it still a pre-construction project?"
+        ],
         "required": False,
         "condition": lambda state: state.get("transaction_type", "").lower() == "purchasing",
         "next": "property_type"
@@ -69,30 +109,55 @@ QUESTIONS = [
     {
         "id": "property_type",
         "text": "What is the type of the property you're closing on? Condo Apartment, Detached House, Semi-detached House, Freehold Townhouse, Condo Townhouse, Multiplex or other?",
+        "rephrase_variants": [
+            "What kind of property is it? For example, a condo apartment, a detached house, or a townhouse.",
+            "Is the property a condo, a house, a townhouse, a multiplex, or something else?",
+            "What type of home are you closing on, such as a condo apartment, a semi-detached house, or a freehold townhouse?"
+        ],
         "required": True,
         "next": "closing_date"
     },
     {
         "id": "closing_date",
         "text": "What is your Closing Date?",
+        "rephrase_variants": [
+            "On what date does the deal close? Please include the month, day and year.",
+            "When is your closing scheduled? The full date would be great.",
+            "What is the closing date for this transaction?"
+        ],
         "required": True,
         "next": "property_postal_code"
     },
     {
         "id": "property_postal_code",
         "text": "Do you know the property postal code? No problem if you don't have this information now.",
+        "rephrase_variants": [
+            "What is the postal code of the property? It's fine to say you don't know it.",
+            "Do you have the property's postal code handy? If not, just let me know.",
+            "Could you tell me the postal code for the property, if you know it?"
+        ],
         "required": True,
         "next": "property_address"
     },
     {
         "id": "property_address",
         "text": "Ok! Please tell me the property address, including the city.",
+        "rephrase_variants": [
+            "What is the full address of the property, including the street and city?",
+            "Could you tell me the street address and city of the property?",
+            "Where is the property located? Please include the street address and the city."
+        ],
         "required": True,
         "next": "living_at_property"
     },
     {
         "id": "living_at_property",
         "text": "Is this the address where you will be living after closing?",
+        "rephrase_variants": [
+            "After closing, will you be living at this property? A yes or no is fine.",
+            "Will this property be your home once the deal closes?",
+            "Do you plan to live at this address after closing?"
+        ],
         "required": False,
         "condition": lambda state: state.get("transaction_type", "").lower() == "purchasing",
         "next": lambda state: "alternative_address" if state.get("living_at_property", "").lower() in ["no", "n", "nope"] else "property_usage"
@@ -114,6 +179,11 @@ QUESTIONS = [
     {
         "id": "property_usage",
         "text": "How do you intend to use the property you are acquiring? Primary Residence, Secondary Residence, Investment Property, Fix and Flip, Family Use or Other uses?",
+        "rephrase_variants": [
+            "How will you use the property? For example, as your main home, a second home, or an investment.",
+            "Will this be your primary residence, a secondary residence, an investment property, or something else?",
+            "What do you plan to do with the property: live in it, rent it out, flip it, or use it for family?"
+        ],
         "required": False,
         "condition": lambda state: state.get("transaction_type", "").lower() == "purchasing",
         "next": lambda state: "marital_status" if (state.get("property_usage", "").lower() == "primary residence" or 
@@ -141,6 +211,11 @@ QUESTIONS = [
     {
         "id": "marital_status",
         "text": "What is your marital status? Married, Common Law Partner, Single, Divorced or Separed?",
+        "rephrase_variants": [
+            "Are you married, in a common-law relationship, single, divorced, or separated?",
+            "What is your current marital status?",
+            "Could you tell me your relationship status: married, common law, single, divorced, or separated?"
+        ],
         "required": True,
         "next": lambda state: "spouse_first_name" if state.get("marital_status", "").lower() in ["married", "common law partner", "common law", "common-law"] else "single_additional_applicants_question"
     },
@@ -252,6 +327,11 @@ QUESTIONS = [
     {
         "id": "multiple_owners_question",
         "text": "Will the property have multiple owners?",
+        "rephrase_variants": [
+            "Will anyone besides you be an owner of this property?",
+            "Is more than one person going to own the property? A yes or no is fine.",
+            "Will the property be owned by more than one person?"
+        ],
         "required": True,
         "condition": lambda state: (state.get("marital_status", "").lower() in ["married", "common law partner", "common law", "common-law"] or
                                   state.get("additional_applicants_question", "").lower() not in ["no", "n", "nope"] or
@@ -268,6 +348,11 @@ QUESTIONS = [
     {
         "id": "primary_applicant_ownership_percentage",
         "text": "What will be your percentage of ownership?",
+        "rephrase_variants": [
+            "What percentage of the property will you own?",
+            "How much of the property will be in your name, as a percentage?",
+            "What share of ownership will you have? For example, fifty percent."
+        ],
         "required": False,
         "condition": lambda state: state.get("title_holding_question", "").lower() == "tenants in common",
         "next": lambda state: "spouse_ownership_percentage" if state.get("marital_status", "").lower() in ["married", "common law partner", "common law", "common-law"] else "additional_applicant_ownership_percentage"
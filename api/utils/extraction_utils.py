@@ -4,58 +4,178 @@ Extraction Utilities
 This module provides utility functions for extracting structured information from user responses.
 """
 
-from typing import Dict, Any, List, Tuple
+import re
+from dataclasses import dataclass
+from typing import Dict, Any, List, Tuple, Optional
+
+@dataclass(frozen=True, slots=True)
+class FieldInfo:
+    """Expected type and format of a form field's answer."""
+    type: str
+    format: str = "text"
+
+# Used for questions that aren't in FIELD_MAPPING
+DEFAULT_FIELD = FieldInfo("text", "text")
 
 # Mapping of question IDs to expected field types and formats
 FIELD_MAPPING = {
     # Main applicant fields
-    "applicant_first_name": {"type": "name", "format": "text"},
-    "applicant_last_name": {"type": "name", "format": "text"},
-    "applicant_dob": {"type": "date", "format": "YYYY-MM-DD"},
-    "applicant_first_time_buyer": {"type": "boolean", "format": "yes/no"},
-    "applicant_citizenship": {"type": "boolean", "format": "yes/no"},
-    "applicant_decision_making": {"type": "boolean", "format": "yes/no"},
+    "applicant_first_name": FieldInfo("name", "text"),
+    "applicant_last_name": FieldInfo("name", "text"),
+    "applicant_dob": FieldInfo("date", "YYYY-MM-DD"),
+    "applicant_first_time_buyer": FieldInfo("boolean", "yes/no"),
+    "applicant_citizenship": FieldInfo("boolean", "yes/no"),
+    "applicant_decision_making": FieldInfo("boolean", "yes/no"),
     
     # Spouse fields
-    "spouse_first_name": {"type": "name", "format": "text"},
-    "spouse_last_name": {"type": "name", "format": "text"},
-    "spouse_dob": {"type": "date", "format": "YYYY-MM-DD"},
-    "spouse_first_time_buyer": {"type": "boolean", "format": "yes/no"},
-    "spouse_citizenship": {"type": "boolean", "format": "yes/no"},
+    "spouse_first_name": FieldInfo("name", "text"),
+    "spouse_last_name": FieldInfo("name", "text"),
+    "spouse_dob": FieldInfo("date", "YYYY-MM-DD"),
+    "spouse_first_time_buyer": FieldInfo("boolean", "yes/no"),
+    "spouse_citizenship": FieldInfo("boolean", "yes/no"),
     
     # Property information
-    "transaction_type": {"type": "choice", "format": "Purchase/Sell/Refinance"},
-    "property_construction_status": {"type": "text", "format": "text"},
-    "property_type": {"type": "choice", "format": "text"},
-    "closing_date": {"type": "date", "format": "YYYY-MM-DD"},
-    "property_postal_code": {"type": "text", "format": "text"},
-    "property_address": {"type": "address", "format": "text"},
-    "living_at_property": {"type": "boolean", "format": "yes/no"},
-    "alternative_address": {"type": "address", "format": "text"},
-    "alternative_postal_code": {"type": "text", "format": "text"},
-    "property_usage": {"type": "choice", "format": "text"},
-    "client_living_address": {"type": "address", "format": "text"},
-    "client_living_postal_code": {"type": "text", "format": "text"},
+    "transaction_type": FieldInfo("choice", "Purchase/Sell/Refinance"),
+    "property_construction_status": FieldInfo("text", "text"),
+    "property_type": FieldInfo("choice", "text"),
+    "closing_date": FieldInfo("date", "YYYY-MM-DD"),
+    "property_postal_code": FieldInfo("text", "text"),
+    "property_address": FieldInfo("address", "text"),
+    "living_at_property": FieldInfo("boolean", "yes/no"),
+    "alternative_address": FieldInfo("address", "text"),
+    "alternative_postal_code": FieldInfo("text", "text"),
+    "property_usage": FieldInfo("choice", "text"),
+    "client_living_address": FieldInfo("address", "text"),
+    "client_living_postal_code": FieldInfo("text", "text"),
     
     # Marital status and applicants
-    "marital_status": {"type": "choice", "format": "text"},
-    "additional_applicants_question": {"type": "boolean", "format": "yes/no"},
-    "single_additional_applicants_question": {"type": "boolean", "format": "yes/no"},
+    "marital_status": FieldInfo("choice", "text"),
+    "additional_applicants_question": FieldInfo("boolean", "yes/no"),
+    "single_additional_applicants_question": FieldInfo("boolean", "yes/no"),
     
     # Title holding
-    "multiple_owners_question": {"type": "boolean", "format": "yes/no"},
-    "title_holding_question": {"type": "choice", "format": "text"},
-    "primary_applicant_ownership_percentage": {"type": "percentage", "format": "number"},
-    "spouse_ownership_percentage": {"type": "percentage", "format": "number"},
-    "additional_applicant_ownership_percentage": {"type": "percentage", "format": "number"},
+    "multiple_owners_question": FieldInfo("boolean", "yes/no"),
+    "title_holding_question": FieldInfo("choice", "text"),
+    "primary_applicant_ownership_percentage": FieldInfo("percentage", "number"),
+    "spouse_ownership_percentage": FieldInfo("percentage", "number"),
+    "additional_applicant_ownership_percentage": FieldInfo("percentage", "number"),
     
     # Professional info
-    "mortgage_advisor": {"type": "structured", "format": "name|company|lender"},
-    "real_estate_agent": {"type": "structured", "format": "name|company"},
-    "home_insurance": {"type": "boolean", "format": "yes/no"},
-    "home_insurance_details": {"type": "structured", "format": "company|advisor"}
+    "mortgage_advisor": FieldInfo("structured", "name|company|lender"),
+    "real_estate_agent": FieldInfo("structured", "name|company"),
+    "home_insurance": FieldInfo("boolean", "yes/no"),
+    "home_insurance_details": FieldInfo("structured", "company|advisor")
 }
 
+# Field type -> extraction prompt template; anything else uses "default"
+TEMPLATE_KEYS = {
+    "structured": "structured",
+    "name": "name",
+    "boolean": "boolean"
+}
+
+# Structured question IDs -> (structure type, expected fields) for the structured prompt
+STRUCTURED_FIELDS = {
+    "mortgage_advisor": (
+        "mortgage advisor",
+        "- Name: The mortgage advisor's full name\n- Company: Their brokerage company\n- Lender: The lending institution"
+    ),
+    "real_estate_agent": (
+        "real estate agent",
+        "- Name: The real estate agent's full name\n- Company: Their brokerage company"
+    ),
+    "home_insurance_details": (
+        "insurance information",
+        "- Company: The insurance company name\n- Advisor: The insurance advisor's name"
+    )
+}
+
+# Unambiguous spoken yes/no answers that don't need the LLM, when they open the reply
+YES_WORDS = frozenset({"yes", "yeah", "yep", "yup", "sure", "correct", "absolutely", "definitely"})
+NO_WORDS = frozenset({"no", "nope", "nah", "negative"})
+# Replies that open with "no" without answering the question
+NON_ANSWER_PHRASES = ("no idea", "no problem", "no clue", "no worries", "no rush")
+NEGATION_PATTERN = re.compile(r"\bnot\b|n't\b", re.IGNORECASE)
+
+# Hesitation sounds that carry no answer when spoken on their own
+# ("mm hmm" and "uh huh" are confirmations, see CONFIRMATION_PHRASES)
+FILLER_WORDS = frozenset({"uh", "um", "umm", "uhm", "hmm", "hm", "er", "erm", "ah", "eh", "mm"})
+NON_WORD_CHARACTERS = re.compile(r"[^\w\s']")
+
+def is_filler_response(user_response: Optional[str]) -> bool:
+    """
+    Check if a response is empty or a lone hesitation sound ("uh", "hmm", ...).
+    
+    Args:
+        user_response: The user's transcribed response
+        
+    Returns:
+        True if there is nothing to extract from the response
+    """
+    if not user_response:
+        return True
+    words = NON_WORD_CHARACTERS.sub(" ", user_response).lower().split()
+    return not words or (len(words) == 1 and words[0] in FILLER_WORDS)
+
+def parse_yes_no(user_response: str) -> Optional[str]:
+    """
+    Classify a clear yes/no answer locally.
+    
+    Args:
+        user_response: The user's response to a yes/no question
+        
+    Returns:
+        "yes" or "no" when the reply opens with one, or None if it is ambiguous
+        (mixed, negated, a phrase like "no idea", or the answer is buried mid-sentence)
+    """
+    utterance = normalize_utterance(user_response)
+    if (not utterance or NEGATION_PATTERN.search(utterance)
+            or utterance.startswith(NON_ANSWER_PHRASES)):
+        return None
+    
+    words = utterance.split()
+    is_yes = words[0] in YES_WORDS
+    is_no = words[0] in NO_WORDS
+    if not (is_yes or is_no):
+        return None
+    # "yeah, no" and friends stay with the LLM
+    if any(word in (NO_WORDS if is_yes else YES_WORDS) for word in words[1:]):
+        return None
+    return "yes" if is_yes else "no"
+
+# Whole responses that confirm pre-filled data, and openings that ask to go back
+CONFIRMATION_PHRASES = frozenset({
+    "yes", "yeah", "yep", "yup", "correct", "right", "that's right", "that's correct",
+    "yes that's right", "yes that's correct", "confirmed", "sure", "ok", "okay",
+    # Spoken affirmatives, after normalize_utterance() has stripped the hyphen
+    "mm hmm", "mmhmm", "uh huh", "mhm"
+})
+GO_BACK_PHRASES = ("go back", "previous", "undo", "i made a mistake")
+
+def normalize_utterance(user_response: Optional[str]) -> str:
+    """
+    Lower-case a response and strip punctuation so it can be looked up in a phrase set.
+    """
+    if not user_response:
+        return ""
+    return " ".join(NON_WORD_CHARACTERS.sub(" ", user_response).lower().split())
+
+def is_confirmation(user_response: Optional[str]) -> bool:
+    """
+    Check if a response is nothing more than a confirmation ("yes", "that's right", ...).
+    """
+    return normalize_utterance(user_response) in CONFIRMATION_PHRASES
+
+def is_go_back_request(user_response: Optional[str]) -> bool:
+    """
+    Check if a response opens by asking to go back or undo a previous answer.
+    """
+    return normalize_utterance(user_response).startswith(GO_BACK_PHRASES)
+
+def get_field_info(question_id: str) -> FieldInfo:
+    """Return the FieldInfo for a question, or DEFAULT_FIELD if it isn't mapped"""
+    return FIELD_MAPPING.get(question_id, DEFAULT_FIELD)
+
 def format_conversation_history(history: List) -> str:
     """
     Format the conversation history for prompt templates.
@@ -80,7 +200,7 @@ def get_extraction_prompt(question_id: str, question_text: str, user_response: s
         question_id: The ID of the current question
         question_text: The text of the current question
         user_response: The user's response to extract from
-        field_mapping: Dictionary mapping question IDs to field types and formats (defaults to FIELD_MAPPING)
+        field_mapping: Dictionary mapping question IDs to FieldInfo (defaults to FIELD_MAPPING)
         
     Returns:
         Dictionary with template key and data for the prompt
@@ -89,42 +209,22 @@ def get_extraction_prompt(question_id: str, question_text: str, user_response: s
     if field_mapping is None:
         field_mapping = FIELD_MAPPING
         
-    field_info = field_mapping.get(question_id, {"type": "text", "format": "text"})
-    field_type = field_info["type"]
-    field_format = field_info["format"]
+    field_info = field_mapping.get(question_id, DEFAULT_FIELD)
+    field_type = field_info.type
+    field_format = field_info.format
     
     prompt_data = {
         "question_text": question_text,
-        "question_id": question_id,
         "user_response": user_response,
         "expected_format": field_format
     }
     
     # Template names should be defined in the agent
-    if field_type == "structured":
-        structure_type = ""
-        expected_fields = ""
-        
-        if question_id == "mortgage_advisor":
-            structure_type = "mortgage advisor"
-            expected_fields = "- Name: The mortgage advisor's full name\n- Company: Their brokerage company\n- Lender: The lending institution"
-        elif question_id == "real_estate_agent":
-            structure_type = "real estate agent"
-            expected_fields = "- Name: The real estate agent's full name\n- Company: Their brokerage company"
-        elif question_id == "home_insurance_details":
-            structure_type = "insurance information"
-            expected_fields = "- Company: The insurance company name\n- Advisor: The insurance advisor's name"
-            
+    template_key = TEMPLATE_KEYS.get(field_type, "default")
+    if template_key == "structured":
+        structure_type, expected_fields = STRUCTURED_FIELDS.get(question_id, ("", ""))
         prompt_data["structure_type"] = structure_type
         prompt_data["expected_fields"] = expected_fields
-        template_key = "structured"
-        
-    elif field_type == "name":
-        template_key = "name"
-    elif field_type == "boolean":
-        template_key = "boolean"
-    else:
-        template_key = "default"
         
     return {"template_key": template_key, "data": prompt_data}
 
@@ -9,8 +9,10 @@ import os
 import json
 import uuid
 import re
+import orjson
 from typing import Dict, Any, List, Optional
 from datetime import datetime
+from flask.json.provider import JSONProvider
 
 # # TESTING ONLY: Directory for test JSON files
 # TEST_JSON_DIR = "test-jsons"
@@ -38,6 +40,15 @@ from datetime import datetime
 #     json.dump(TEST_DATA, f, indent=2)
 
 
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson, used by jsonify() and request.json"""
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
 def load_input_json(filepath: str = "input_json.json") -> Dict[str, Any]:
     """
     Load data from the input JSON file.
@@ -7,6 +7,10 @@ such as finding questions by ID and determining the next question.
 
 from ..questions.questions import QUESTIONS
 
+# QUESTIONS is static, so it is indexed once for O(1) lookups
+QUESTIONS_BY_ID = {question["id"]: question for question in QUESTIONS}
+QUESTION_INDEX = {question["id"]: index for index, question in enumerate(QUESTIONS)}
+
 def get_question_by_id(question_id):
     """
     Get a question by its ID
@@ -17,10 +21,7 @@ def get_question_by_id(question_id):
     Returns:
         dict: The question object if found, or None if not found
     """
-    for question in QUESTIONS:
-        if question["id"] == question_id:
-            return question
-    return None
+    return QUESTIONS_BY_ID.get(question_id)
 
 def get_next_question_id(current_question_id, state):
     """
@@ -56,15 +57,10 @@ def get_previous_question_id(current_id: str) -> str:
     Returns:
         The ID of the previous question, or "applicant_first_name" if not found
     """
-    question_ids = [q["id"] for q in QUESTIONS]
+    current_index = QUESTION_INDEX.get(current_id, 0)
     
-    try:
-        current_index = question_ids.index(current_id)
-        
-        if current_index > 0:
-            return question_ids[current_index - 1]
-    except ValueError:
-        pass
+    if current_index > 0:
+        return QUESTIONS[current_index - 1]["id"]
         
     return "applicant_first_name"
 
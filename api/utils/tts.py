@@ -12,6 +12,8 @@ import random
 import hashlib
 import threading
 import time
+import re
+import logging
 from openai import OpenAI
 from dotenv import load_dotenv
 
@@ -19,6 +21,7 @@ from flask import url_for
 from twilio.twiml.voice_response import VoiceResponse, Gather, Say, Hangup
 # Load environment variables
 load_dotenv()
+logger = logging.getLogger(__name__)
 openai_api_key = os.getenv("OPENAI_API_KEY")
 
 client = OpenAI(api_key=openai_api_key)
@@ -28,6 +31,30 @@ OPENAI_VOICES = ["alloy"]
 CACHE_DIR = os.path.join(tempfile.gettempdir(), "tts_cache")
 os.makedirs(CACHE_DIR, exist_ok=True)
 
+# Upper bound on the size of CACHE_DIR; least recently used files are evicted first
+CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", 10 * 1024 * 1024))
+
+# Bytes written to CACHE_DIR between two prune_cache() sweeps
+CACHE_PRUNE_BYTES = int(os.getenv("TTS_CACHE_PRUNE_BYTES", CACHE_MAX_BYTES // 10))
+
+# How long text_to_speech_sentences() waits for the first audio bytes before
+# falling back to Twilio's own <Say> for the remaining sentences
+FIRST_AUDIO_TIMEOUT = float(os.getenv("TTS_FIRST_AUDIO_TIMEOUT", "2.0"))
+
+# Splits agent responses into sentences that are synthesized independently
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+
+# Seconds without new bytes after which a .part file written by another worker is
+# treated as abandoned (that worker crashed or was recycled mid-synthesis)
+PART_STALL_SECONDS = float(os.getenv("TTS_PART_STALL_SECONDS", "15"))
+
+# In-flight syntheses of this process: filename -> (.part path, completion event, first-bytes event)
+_pending = {}
+# Filenames whose last synthesis attempt failed; cleared when retried
+_failed = set()
+_pending_lock = threading.Lock()
+_bytes_since_prune = 0
+
 # Default speed increased for faster response
 DEFAULT_SPEED = 1
 
@@ -55,10 +82,262 @@ IS_SPEAKING = False
 # """
 
 def get_cache_key(text, voice, speed):
-    """Generate a cache key based on text, voice and speed"""
-    hash_obj = hashlib.md5(f"{text}_{voice}_{speed}".encode())
+    """Generate a content-addressed cache key based on text, voice and speed"""
+    hash_obj = hashlib.sha256(f"{voice}|{speed}|{text}".encode())
     return hash_obj.hexdigest()
 
+def prune_cache(max_bytes=CACHE_MAX_BYTES):
+    """
+    Evict least recently used MP3 files until CACHE_DIR fits in max_bytes.
+
+    Args:
+        max_bytes (int): Maximum total size of the cached audio files
+    """
+    entries = []
+    total = 0
+    with os.scandir(CACHE_DIR) as it:
+        for entry in it:
+            if not entry.name.endswith(".mp3"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_atime, stat.st_size, entry.path))
+            total += stat.st_size
+
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except FileNotFoundError:
+            pass
+
+def _record_cache_write(size):
+    """Prune CACHE_DIR once CACHE_PRUNE_BYTES have been written since the last sweep"""
+    global _bytes_since_prune
+    with _pending_lock:
+        _bytes_since_prune += size
+        if _bytes_since_prune < CACHE_PRUNE_BYTES:
+            return
+        _bytes_since_prune = 0
+    prune_cache()
+
+def _stream_to_cache(filename, part_file, text, voice, speed, done, first_bytes):
+    """
+    Write the OpenAI TTS response into CACHE_DIR chunk by chunk.
+
+    Bytes are flushed to the .part file as soon as they arrive so that
+    stream_audio() can forward them to Twilio before synthesis finishes.
+    The .part file is atomically renamed to the final MP3 on success;
+    failures are recorded in _failed so callers can fall back to <Say>.
+    """
+    part_path = part_file.name
+    cache_path = os.path.join(CACHE_DIR, filename)
+    size = 0
+    try:
+        with client.audio.speech.with_streaming_response.create(
+            model="tts-1",
+            voice=voice,
+            input=text,
+            speed=speed
+        ) as response:
+            for chunk in response.iter_bytes():
+                part_file.write(chunk)
+                part_file.flush()
+                size += len(chunk)
+                first_bytes.set()
+        part_file.close()
+        os.replace(part_path, cache_path)
+    except Exception as e:
+        logger.error("TTS Error: %s", e)
+        size = 0
+        with _pending_lock:
+            _failed.add(filename)
+    finally:
+        part_file.close()
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        with _pending_lock:
+            _pending.pop(filename, None)
+        first_bytes.set()
+        done.set()
+
+    if size:
+        _record_cache_write(size)
+
+def start_synthesis(text, voice, speed=DEFAULT_SPEED):
+    """
+    Make sure the MP3 for text/voice/speed exists or is being generated.
+
+    Cache hits skip the OpenAI round-trip entirely. Misses start a background
+    thread that streams the audio into CACHE_DIR and return immediately, so
+    the caller can hand the URL to Twilio while synthesis is still running.
+
+    Args:
+        text (str): Text to convert to speech
+        voice (str): OpenAI voice to use
+        speed (float): Speed of speech playback
+
+    Returns:
+        filename (str): Name of the MP3 file inside CACHE_DIR
+    """
+    filename = f"{get_cache_key(text, voice, speed)}.mp3"
+    cache_path = os.path.join(CACHE_DIR, filename)
+
+    if os.path.exists(cache_path):
+        # Refresh access time so the LRU sweep keeps frequently used phrases
+        os.utime(cache_path)
+        return filename
+
+    with _pending_lock:
+        if filename in _pending:
+            return filename
+        _failed.discard(filename)
+        # Create the .part file before returning so /audio can always find it
+        part_file = open(f"{cache_path}.part", "wb")
+        done = threading.Event()
+        first_bytes = threading.Event()
+        _pending[filename] = (part_file.name, done, first_bytes)
+
+    thread = threading.Thread(
+        target=_stream_to_cache,
+        args=(filename, part_file, text, voice, speed, done, first_bytes))
+    thread.daemon = True
+    thread.start()
+
+    return filename
+
+def wait_for_audio(filename, timeout):
+    """
+    Wait until an MP3 can be served, either from the cache or while streaming.
+
+    Args:
+        filename (str): Name of the MP3 file inside CACHE_DIR
+        timeout (float): Maximum number of seconds to wait for the first bytes
+
+    Returns:
+        bool: False if synthesis failed or produced no audio within timeout
+    """
+    cache_path = os.path.join(CACHE_DIR, filename)
+    with _pending_lock:
+        pending = _pending.get(filename)
+    if pending is not None and not pending[2].wait(max(timeout, 0)):
+        return False
+    with _pending_lock:
+        if filename in _failed:
+            return False
+        if filename in _pending:
+            return True
+    return os.path.exists(cache_path)
+
+def synthesize_speech(text, voice, speed=DEFAULT_SPEED):
+    """
+    Blocking variant of start_synthesis that waits for the MP3 to be written.
+
+    Returns:
+        filename (str): Name of the MP3 file inside CACHE_DIR
+    """
+    filename = start_synthesis(text, voice, speed)
+    with _pending_lock:
+        pending = _pending.get(filename)
+    if pending:
+        pending[1].wait()
+    return filename
+
+def stream_audio(filename, chunk_size=4096):
+    """
+    Stream an MP3 that is still being synthesized.
+
+    Reads the growing .part file and yields bytes as they arrive instead of
+    waiting for the end of the file. The .part file lives in CACHE_DIR, so a
+    request routed to another worker on the same host follows it from disk
+    until the writer renames it to the final MP3 (or removes it on failure).
+    Workers that do not share CACHE_DIR, e.g. separate serverless instances,
+    still cannot see each other's syntheses.
+
+    Args:
+        filename (str): Name of the MP3 file inside CACHE_DIR
+        chunk_size (int): Maximum number of bytes per yielded chunk
+
+    Returns:
+        A generator of MP3 byte chunks, or None if nothing is being synthesized
+    """
+    with _pending_lock:
+        pending = _pending.get(filename)
+    if pending is not None:
+        part_path, done, _ = pending
+        is_done = done.is_set
+        stall_seconds = None
+    else:
+        # Synthesized by another worker: the writer is done once its .part is gone
+        part_path = os.path.join(CACHE_DIR, f"{filename}.part")
+        done = threading.Event()
+        is_done = lambda: not os.path.exists(part_path)
+        stall_seconds = PART_STALL_SECONDS
+
+    try:
+        # The descriptor keeps following the same file after the rename
+        audio_file = open(part_path, "rb")
+    except FileNotFoundError:
+        return None
+
+    def _generate():
+        last_data = time.monotonic()
+        with audio_file:
+            while True:
+                data = audio_file.read(chunk_size)
+                if data:
+                    last_data = time.monotonic()
+                    yield data
+                elif is_done():
+                    remaining = audio_file.read()
+                    if remaining:
+                        yield remaining
+                    break
+                elif stall_seconds is not None and time.monotonic() - last_data > stall_seconds:
+                    logger.warning("Abandoned TTS part file: %s", part_path)
+                    break
+                else:
+                    done.wait(0.05)
+
+    return _generate()
+
+def warm_cache(texts, voice="alloy", speed=DEFAULT_SPEED):
+    """
+    Pre-generate audio for static prompts in a background thread.
+
+    Args:
+        texts (list): Phrases that are spoken verbatim (welcome message, etc.)
+        voice (str): OpenAI voice to use
+        speed (float): Speed of speech playback
+    """
+    def _warm():
+        for text in texts:
+            try:
+                synthesize_speech(text, voice, speed)
+            except Exception as e:
+                logger.error("TTS warm-up error: %s", e)
+
+    thread = threading.Thread(target=_warm)
+    thread.daemon = True
+    thread.start()
+
+def prefetch_speech(texts, voice="alloy", speed=DEFAULT_SPEED):
+    """
+    Pre-generate the per-sentence audio that text_to_speech_sentences() will
+    ask for when these texts are spoken during a call.
+
+    Args:
+        texts (list): Responses that are spoken verbatim (farewell, etc.)
+        voice (str): OpenAI voice to use
+        speed (float): Speed of speech playback
+    """
+    warm_cache([sentence for text in texts for sentence in split_sentences(text)],
+               voice, speed)
+
 def get_speaking_status():
     """Get the current speaking status for STT module"""
     global IS_SPEAKING
@@ -99,7 +378,16 @@ def play_audio_async(file_path):
     # before returning control to the main program
     time.sleep(0.1)
 
-def text_to_speech(text, voice=None, speed=DEFAULT_SPEED):
+def resolve_voice(voice):
+    """Map a requested voice onto a supported OpenAI voice"""
+    # Choose a random voice if not specified
+    if voice is None or voice.endswith("-PlayAI"):
+        return random.choice(OPENAI_VOICES)
+    if voice not in OPENAI_VOICES:
+        return "alloy"
+    return voice
+
+def text_to_speech(text, voice=None, speed=DEFAULT_SPEED, timeout=None):
     """
     Convert text to speech using OpenAI's TTS API with minimal latency.
     
@@ -107,47 +395,113 @@ def text_to_speech(text, voice=None, speed=DEFAULT_SPEED):
         text (str): Text to convert to speech
         voice (str): Voice to use for TTS (default: random OpenAI voice)
         speed (float): Speed of speech playback (default: 1.5)
+        timeout (float): If set, wait this long for the first audio bytes and
+            return None when synthesis failed or has not started by then
         
     Returns:
         voice reponse (str): TwiML for mp3
     """
     
-    # Choose a random voice if not specified
-    if voice is None or voice.endswith("-PlayAI"):
-        voice = random.choice(OPENAI_VOICES)
-    elif voice not in OPENAI_VOICES:
-        voice = "alloy"  
+    voice = resolve_voice(voice)
     
+    audio_url = None
     try:
-        # Check cache first
-        cache_key = get_cache_key(text, voice, speed)
-        cache_path = os.path.join(CACHE_DIR, f"{cache_key}.mp3")
-        
-        if not os.path.exists(cache_path):
-            # Generate speech using OpenAI API
- 
-           with client.audio.speech.with_streaming_response.create(
-                model="tts-1",
-                voice=voice,
-                input=text,
-                speed=speed
-            ) as response:
-                response.stream_to_file(cache_path)
-        
+        filename = start_synthesis(text, voice, speed)
+        if timeout is not None and not wait_for_audio(filename, timeout):
+            return None
+
         # Play audio asynchronously - doesn't block execution
         # play_audio_async(cache_path)
         audio_url = url_for("serve_audio",
-                        filename=f"{cache_key}.mp3",
+                        filename=filename,
                         _external=True)   # absolute HTTPS URL
-        
-        
 
-            
     except Exception as e:
-        print(f"TTS Error: {e}")
+        logger.error("TTS Error: %s", e)
         # TTS failed but we still printed the text
     return audio_url
 
+def split_sentences(text):
+    """Split text into sentences on ., ! and ? boundaries"""
+    return [sentence for sentence in SENTENCE_BOUNDARY.split(text.strip()) if sentence]
+
+def prefetch_sentences(text, voice="alloy", speed=DEFAULT_SPEED):
+    """
+    Start synthesizing every complete sentence of a partially generated response.
+
+    Used while an LLM response is still streaming, so the audio for the
+    first sentences is ready (or already streaming) by the time
+    text_to_speech_sentences() asks for the full response.
+
+    Args:
+        text (str): Response text generated so far
+        voice (str): OpenAI voice to use
+        speed (float): Speed of speech playback
+
+    Returns:
+        remainder (str): Trailing text that does not end a sentence yet
+    """
+    *sentences, remainder = SENTENCE_BOUNDARY.split(text.lstrip())
+    for sentence in sentences:
+        if sentence:
+            start_synthesis(sentence, voice, speed)
+    return remainder
+
+def prefetch_response(text, voice="alloy", speed=DEFAULT_SPEED):
+    """
+    Start synthesizing every sentence of a finished response without waiting.
+
+    Used as soon as a workflow node produces its response, so synthesis
+    overlaps the rest of the graph step instead of starting after it.
+
+    Args:
+        text (str): Complete response text
+        voice (str): OpenAI voice to use
+        speed (float): Speed of speech playback
+    """
+    for sentence in split_sentences(text):
+        start_synthesis(sentence, voice, speed)
+
+def text_to_speech_sentences(text, voice=None, speed=DEFAULT_SPEED,
+                             timeout=FIRST_AUDIO_TIMEOUT):
+    """
+    Convert text to speech one sentence at a time.
+
+    Every sentence is synthesized concurrently, so Twilio can start playing
+    the first (short) sentence while the rest are still being generated.
+    Short sentences are also far more likely to be shared between prompts
+    and served from the cache. A URL is only handed out once its audio has
+    started arriving; sentences whose synthesis failed or did not start
+    within timeout come back without one.
+
+    Args:
+        text (str): Text to convert to speech
+        voice (str): Voice to use for TTS
+        speed (float): Speed of speech playback
+        timeout (float): Seconds to wait, in total, for the first audio bytes
+
+    Returns:
+        spoken (list): (sentence, audio_url) pairs in speaking order, with
+            audio_url None when the sentence has to be spoken with <Say>
+    """
+    voice = resolve_voice(voice)
+    filenames = []
+    for sentence in split_sentences(text):
+        try:
+            filenames.append((sentence, start_synthesis(sentence, voice, speed)))
+        except Exception as e:
+            logger.error("TTS Error: %s", e)
+            filenames.append((sentence, None))
+
+    deadline = time.monotonic() + timeout
+    spoken = []
+    for sentence, filename in filenames:
+        audio_url = None
+        if filename and wait_for_audio(filename, deadline - time.monotonic()):
+            audio_url = url_for("serve_audio", filename=filename, _external=True)
+        spoken.append((sentence, audio_url))
+    return spoken
+
 # Commented out Groq implementation
 """
 def text_to_speech(text, voice="Celeste-PlayAI"):
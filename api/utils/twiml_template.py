@@ -2,7 +2,13 @@ from twilio.twiml.voice_response import VoiceResponse, Gather
 import os
 from dotenv import load_dotenv
 import re
-from .tts import text_to_speech
+from functools import lru_cache
+from typing import Optional
+from .tts import text_to_speech, FIRST_AUDIO_TIMEOUT
+
+DOMAIN = os.environ.get("DOMAIN")
+
+WELCOME_MESSAGE = "Hi there! I'm your virtual assistant. I'm here to guide you through the intake process for your real estate closing. I'll be asking you a few questions — this should take about 5 minutes. Before we begin, please make sure you're in a quiet place and make sure to speak slowly and clearly. Don't worry if you are not able to answer some questions. We will send you a summary of the information you provide to us to your email and you will be able to adjust anything using the philer platform. Press any button to start!"
 
 
 def introduction() -> str:
@@ -10,14 +16,34 @@ def introduction() -> str:
     Returns TwiML code for introductory message. 
     """
 
-    DOMAIN = os.environ.get("DOMAIN")
+    # Still goes through the TTS cache so an evicted welcome MP3 is regenerated;
+    # the URL is content-addressed, so the TwiML itself is built only once
+    audio_url = text_to_speech(WELCOME_MESSAGE, timeout=FIRST_AUDIO_TIMEOUT)
+    if audio_url is None:
+        # TTS failed: let Twilio read the welcome, and retry synthesis on the next call
+        return _build_introduction_twiml(DOMAIN, None)
+    return _introduction_twiml(DOMAIN, audio_url)
+
 
+@lru_cache(maxsize=8)
+def _introduction_twiml(domain: str, audio_url: str) -> str:
+    """
+    Returns the serialized introduction TwiML for a domain and welcome audio URL.
+    """
+    return _build_introduction_twiml(domain, audio_url)
+
+
+def _build_introduction_twiml(domain: str, audio_url: Optional[str]) -> str:
+    """
+    Builds the introduction TwiML, speaking the welcome with <Say> when there is no audio.
+    """
     response = VoiceResponse()
     gather = Gather(
-        numDigits=1, action=f"{DOMAIN}/in-call", method="POST")
-    welcome_message = "Hi there! I'm your virtual assistant. I'm here to guide you through the intake process for your real estate closing. I'll be asking you a few questions — this should take about 5 minutes. Before we begin, please make sure you're in a quiet place and make sure to speak slowly and clearly. Don't worry if you are not able to answer some questions. We will send you a summary of the information you provide to us to your email and you will be able to adjust anything using the philer platform. Press any button to start!"
-    audio_url = text_to_speech(welcome_message)
-    gather.play(audio_url)
+        numDigits=1, action=f"{domain}/in-call", method="POST")
+    if audio_url:
+        gather.play(audio_url)
+    else:
+        gather.say(WELCOME_MESSAGE)
     response.append(gather)
 
     return str(response)